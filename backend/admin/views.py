@@ -1,6 +1,7 @@
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Count
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
@@ -24,7 +25,7 @@ User = get_user_model()
 
 from bookings.models import Booking, Feedback
 from mentors.models import MentorDetails
-from notifications.tasks import send_realtime_notification_task
+from notifications.outbox import enqueue_notification
 
 # Create your views here.
 
@@ -158,16 +159,17 @@ class ApproveRejectMentorView(generics.GenericAPIView):
             mentor.is_verified = True
             mentor.verification_status = 'approved'
             mentor.rejection_reason = ''
-            mentor.save()
-            
-            send_realtime_notification_task.delay(
-                recipient_id=mentor.user.id,
-                sender_id=request.user.id,
-                notification_type="mentor_approved",
-                message="Your mentor application has been approved!",
-                related_object_id=mentor.id,
-                related_object_type="mentor_approval"
-            )
+            with transaction.atomic():
+                mentor.save()
+
+                enqueue_notification(
+                    recipient_id=mentor.user_id,
+                    sender_id=request.user.id,
+                    notification_type="mentor_approved",
+                    message="Your mentor application has been approved!",
+                    related_object_id=mentor.id,
+                    related_object_type="mentor_approval"
+                )
 
             
             return Response(
@@ -182,16 +184,17 @@ class ApproveRejectMentorView(generics.GenericAPIView):
             mentor.is_verified = False
             mentor.verification_status = 'rejected'
             mentor.rejection_reason = reason
-            mentor.save()
-
-            send_realtime_notification_task.delay(
-                recipient_id=mentor.user.id,
-                sender_id=request.user.id,
-                notification_type="mentor_rejected",  
-                message=f"Your mentor application has been rejected. Reason: {reason}",
-                related_object_id=mentor.id,
-                related_object_type="mentor_rejection"
-            )
+            with transaction.atomic():
+                mentor.save()
+
+                enqueue_notification(
+                    recipient_id=mentor.user_id,
+                    sender_id=request.user.id,
+                    notification_type="mentor_rejected",
+                    message=f"Your mentor application has been rejected. Reason: {reason}",
+                    related_object_id=mentor.id,
+                    related_object_type="mentor_rejection"
+                )
 
             return Response(
                 {
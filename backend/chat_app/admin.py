@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 
-from .models import ChatRoom, Message
+from .models import ChatAttachment, ChatRoom, Message, MessageArchive
 
 # Register your models here.
 
@@ -32,3 +32,26 @@ class MessageAdmin(admin.ModelAdmin):
         """
         return obj.content[:75] + '...' if len(obj.content) > 75 else obj.content
     content_preview.short_description = 'Content' # Column header for the preview
+
+
+
+@admin.register(ChatAttachment)
+class ChatAttachmentAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the ChatAttachment model.
+    """
+    list_display = ('id', 'chat_room', 'uploader', 'file_name', 'file_type', 'size', 'status', 'created_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('file_name', 'uploader__username')
+    raw_id_fields = ('chat_room', 'uploader')
+
+
+
+@admin.register(MessageArchive)
+class MessageArchiveAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for the MessageArchive model.
+    """
+    list_display = ('id', 'chat_room', 'month', 'message_count', 'oldest_at', 'newest_at', 'created_at')
+    list_filter = ('month',)
+    raw_id_fields = ('chat_room',)
@@ -0,0 +1,201 @@
+import gzip
+import json
+import logging
+import tempfile
+from datetime import date, datetime
+from datetime import timezone as dt_timezone
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Message, MessageArchive
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'chat_app_message_p'
+
+ARCHIVE_FIELDS = (
+    'id', 'chat_room_id', 'sender_id', 'sender__username', 'content',
+    'timestamp', 'is_read', 'file', 'file_type', 'thumbnail',
+)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def month_bounds(month):
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end_month = add_months(month, 1)
+    return start, datetime(end_month.year, end_month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def ensure_partitions(ahead):
+    """
+    Creates the monthly partitions for the current month and `ahead` months
+    after it. Existing partitions are left alone.
+    """
+    this_month = timezone.now().date().replace(day=1)
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(ahead + 1):
+            cursor.execute("SELECT chat_app_ensure_message_partition(%s)", [add_months(this_month, offset)])
+            created.append(cursor.fetchone()[0])
+    return created
+
+
+def list_partitions():
+    """
+    Returns {first day of month: partition table name} for every monthly
+    partition currently attached to chat_app_message.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'chat_app_message'::regclass"
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        suffix = name[len(PARTITION_PREFIX):]
+        if name.startswith(PARTITION_PREFIX) and len(suffix) == 6 and suffix.isdigit():
+            partitions[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return partitions
+
+
+def _to_record(row):
+    return {
+        'id': row['id'],
+        'chat_room': row['chat_room_id'],
+        'sender': row['sender_id'],
+        'sender_username': row['sender__username'],
+        'content': row['content'],
+        'timestamp': row['timestamp'].isoformat(),
+        'is_read': row['is_read'],
+        'file_type': row['file_type'],
+        'file': row['file'] or None,
+        'thumbnail': row['thumbnail'] or None,
+    }
+
+
+def _upload(room_id, month, spool, count, oldest_at, newest_at):
+    spool.seek(0)
+    name = default_storage.save(f"chat_archive/{room_id}/{month:%Y-%m}.jsonl.gz", File(spool))
+    spool.close()
+    return MessageArchive(
+        chat_room_id=room_id,
+        month=month,
+        file=name,
+        message_count=count,
+        oldest_at=oldest_at,
+        newest_at=newest_at,
+    )
+
+
+def archive_month(month, keep_detached=False):
+    """
+    Exports one monthly partition to gzip-compressed JSONL in storage, one
+    file per chat room, records a MessageArchive per room and detaches the
+    partition (dropping it unless `keep_detached`). Rows are streamed, so
+    memory use does not depend on the size of the partition.
+    Returns the number of archived messages.
+    """
+    partition = list_partitions().get(month)
+    if partition is None:
+        return 0
+
+    start, end = month_bounds(month)
+    rows = (
+        Message.objects
+        .filter(timestamp__gte=start, timestamp__lt=end)
+        .order_by('chat_room_id', 'timestamp', 'id')
+        .values(*ARCHIVE_FIELDS)
+        .iterator(chunk_size=2000)
+    )
+
+    archives = []
+    total = 0
+    room_id = spool = writer = None
+    count = 0
+    oldest_at = newest_at = None
+
+    for row in rows:
+        if row['chat_room_id'] != room_id:
+            if writer is not None:
+                writer.close()
+                archives.append(_upload(room_id, month, spool, count, oldest_at, newest_at))
+            room_id = row['chat_room_id']
+            spool = tempfile.TemporaryFile()
+            writer = gzip.GzipFile(fileobj=spool, mode='wb')
+            count = 0
+            oldest_at = row['timestamp']
+
+        writer.write(json.dumps(_to_record(row)).encode('utf-8') + b'\n')
+        newest_at = row['timestamp']
+        count += 1
+        total += 1
+
+    if writer is not None:
+        writer.close()
+        archives.append(_upload(room_id, month, spool, count, oldest_at, newest_at))
+
+    with transaction.atomic():
+        MessageArchive.objects.bulk_create(archives)
+        with connection.cursor() as cursor:
+            quoted = connection.ops.quote_name(partition)
+            cursor.execute(f"ALTER TABLE chat_app_message DETACH PARTITION {quoted}")
+            if not keep_detached:
+                cursor.execute(f"DROP TABLE {quoted}")
+
+    logger.info(f"Archived {total} messages from {partition} into {len(archives)} room archives")
+    return total
+
+
+def load_archive(archive):
+    """
+    Streams the records of one MessageArchive, oldest first, with
+    `timestamp` parsed back into a datetime.
+    """
+    with default_storage.open(archive.file.name, 'rb') as fh, gzip.GzipFile(fileobj=fh) as reader:
+        for line in reader:
+            record = json.loads(line)
+            record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+            yield record
+
+
+def _position(record):
+    return record['timestamp'], record['id']
+
+
+def read_archived_messages(room_id, before=None, limit=50):
+    """
+    Returns up to `limit` archived messages of a room that are older than the
+    (timestamp, id) position `before`, newest first, and whether older
+    archived messages remain. Only the archives that can contain such
+    messages are read.
+    """
+    archives = MessageArchive.objects.filter(chat_room_id=room_id).order_by('-month')
+    if before is not None:
+        archives = archives.filter(oldest_at__lte=before[0])
+    if limit <= 0:
+        return [], archives.exists()
+
+    archives = list(archives)
+    results = []
+    for index, archive in enumerate(archives):
+        records = [
+            record for record in load_archive(archive)
+            if before is None or _position(record) < before
+        ]
+        records.sort(key=_position, reverse=True)
+        results.extend(records)
+
+        if len(results) >= limit:
+            return results[:limit], len(results) > limit or index + 1 < len(archives)
+
+    return results, False
@@ -0,0 +1,42 @@
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.text import get_valid_filename
+
+
+def build_attachment_name(file_name):
+    """
+    Returns a collision-free storage name under chat_media/ for an upload.
+    """
+    return f"chat_media/{uuid.uuid4().hex}/{get_valid_filename(file_name)}"
+
+
+def generate_presigned_upload(attachment):
+    """
+    Builds a presigned S3 POST that lets the client upload the attachment
+    straight to the bucket. The policy pins the key, content type and exact
+    size that were declared when the attachment was created.
+    """
+    location = getattr(default_storage, 'location', '') or ''
+    key = f"{location.rstrip('/')}/{attachment.file.name}".lstrip('/')
+    client = default_storage.connection.meta.client
+
+    return client.generate_presigned_post(
+        Bucket=default_storage.bucket_name,
+        Key=key,
+        Fields={'Content-Type': attachment.file_type},
+        Conditions=[
+            {'Content-Type': attachment.file_type},
+            ['content-length-range', attachment.size, attachment.size],
+        ],
+        ExpiresIn=settings.CHAT_ATTACHMENT_UPLOAD_EXPIRY,
+    )
+
+
+def verify_uploaded(attachment):
+    """
+    Checks that the client really uploaded the declared object.
+    """
+    name = attachment.file.name
+    return default_storage.exists(name) and default_storage.size(name) == attachment.size
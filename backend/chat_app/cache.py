@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from chat_app.models import ChatRoom
+
+
+class LocalLRUCache:
+    """
+    Small thread-safe in-process LRU with a per-entry TTL. Sits in front of
+    Redis so hot lookups never leave the process.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+_participants = LocalLRUCache(
+    maxsize=settings.CHAT_PARTICIPANT_CACHE_SIZE,
+    ttl=settings.CHAT_PARTICIPANT_LOCAL_TTL,
+)
+
+
+def participants_cache_key(room_id):
+    return f"chat:room:{room_id}:participants"
+
+
+async def get_room_participants(room_id):
+    """
+    Returns (student_id, mentor_id) for a chat room, or None if the room
+    does not exist. Looks in the process LRU, then Redis, then the database
+    with a single values_list query.
+    """
+    participants = _participants.get(room_id)
+    if participants is not None:
+        return participants
+
+    participants = await cache.aget(participants_cache_key(room_id))
+    if participants is None:
+        participants = await (
+            ChatRoom.objects
+            .filter(id=room_id)
+            .values_list('student_id', 'mentor_id')
+            .afirst()
+        )
+        if participants is None:
+            return None
+        participants = tuple(participants)
+        await cache.aset(participants_cache_key(room_id), participants, settings.CHAT_PARTICIPANT_CACHE_TTL)
+
+    _participants.set(room_id, participants)
+    return participants
+
+
+def invalidate_room_participants(room_id):
+    _participants.delete(room_id)
+    cache.delete(participants_cache_key(room_id))
@@ -1,24 +1,45 @@
-import base64
-import json
 import logging
+import uuid
+from urllib.parse import parse_qs
 
 from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.db.models import Q
 
-from chat_app.models import ChatRoom, Message
-from notifications.tasks import send_realtime_notification_task
+from chat_app.cache import get_room_participants
+from chat_app.ephemeral import EPHEMERAL_EVENTS, EphemeralSignals, TokenBucket
+from chat_app.models import ChatAttachment, Message
+from chat_app.pagination import encode_cursor
+from chat_app.redis_utils import increment_unread, take_message_token
+from chat_app.utils import amark_room_read, atouch_room
+from chat_app.write_behind import message_buffer
+from config.frames import FrameProtocolMixin, encode_frame
+from notifications.presence import chat_scope, mark_absent, mark_present
+from notifications.utils import notify_message_received
 
 User = get_user_model() 
 logger = logging.getLogger(__name__)
 
-class ChatConsumer(AsyncWebsocketConsumer):
+
+def record_unread_message(recipient_id, sender_id, room_id):
+    """
+    The Redis side of a new message, batched into a single worker-thread hop.
+    """
+    increment_unread(recipient_id, room_id)
+    notify_message_received(recipient_id, sender_id, room_id)
+
+
+class ChatConsumer(FrameProtocolMixin, AsyncWebsocketConsumer):
     """
     WebSocket consumer for handling real-time chat messages.
     """
+    relay_events = ('chat_message', 'read_receipt', 'ephemeral_event', 'message_ids')
 
     async def connect(self):
+        self.presence_scope = None
+        self.ephemeral = None
         self.room_name = self.scope['url_route']['kwargs']['room_name']
         self.room_group_name = f"chat_{self.room_name}"
         user = self.scope["user"]
@@ -29,20 +50,23 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return
 
         try:
-            self.chat_room_obj = await sync_to_async(ChatRoom.objects.get)(id=self.room_name)
-            student_obj = await sync_to_async(lambda: self.chat_room_obj.student)()
-            mentor_obj = await sync_to_async(lambda: self.chat_room_obj.mentor)()
+            self.room_id = int(self.room_name)
+        except ValueError:
+            self.room_id = None
 
-            if not (user == student_obj or user == mentor_obj):
-                logger.warning(f"WebSocket connection rejected: User {user.username} not authorized for room {self.room_name}")
-                await self.close(code=4003)
-                return
-        except ChatRoom.DoesNotExist:
+        participants = await get_room_participants(self.room_id) if self.room_id else None
+        if participants is None:
             logger.error(f"WebSocket connection rejected: ChatRoom {self.room_name} does not exist.")
-            await self.close(code=4004) 
+            await self.close(code=4004)
             return
 
-        await self.accept()
+        self.student_id, self.mentor_id = participants
+        if user.id not in participants:
+            logger.warning(f"WebSocket connection rejected: User {user.username} not authorized for room {self.room_name}")
+            await self.close(code=4003)
+            return
+
+        await self.accept_frames()
         logger.info(f"WebSocket connection accepted for user {user.username} in room {self.room_name}")
 
         await self.channel_layer.group_add(
@@ -50,108 +74,349 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.channel_name    
         )
 
+        self.ephemeral = EphemeralSignals(
+            self.publish_ephemeral,
+            typing_refresh=settings.CHAT_TYPING_REFRESH_SECONDS,
+            ack_delay=settings.CHAT_RECEIPT_COALESCE_SECONDS
+        )
+        self.ephemeral_bucket = TokenBucket(
+            rate=settings.CHAT_EPHEMERAL_RATE,
+            capacity=settings.CHAT_EPHEMERAL_BURST
+        )
+
+        self.presence_scope = chat_scope(self.room_id)
+        await sync_to_async(mark_present, thread_sensitive=False)(
+            user.id, self.presence_scope, self.channel_name
+        )
+
+        query = parse_qs(self.scope.get('query_string', b'').decode('utf-8'))
+        last_seen_id = query.get('last_seen_id', [None])[0]
+        if last_seen_id is not None:
+            await self.replay_missed(last_seen_id)
+
     async def disconnect(self, close_code):
         logger.info(f"WebSocket connection disconnected from room {self.room_name} with code {close_code}")
 
+        if self.ephemeral:
+            await self.ephemeral.close()
+
+        if settings.CHAT_WRITE_BEHIND:
+            await message_buffer.flush()
+
+        if self.presence_scope:
+            await sync_to_async(mark_absent, thread_sensitive=False)(
+                self.scope["user"].id, self.presence_scope, self.channel_name
+            )
+
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name    
         )
     
-    @sync_to_async
-    def save_message_with_media(self, chat_room_obj, sender, content=None, file_data=None, file_name=None, file_type=None):
-        """Helper function to save message with or without media."""
+    async def save_message(self, room_id, sender, content=None, attachment_id=None):
+        """
+        Helper function to save a message, optionally attaching a file that
+        was already uploaded out-of-band through the attachments endpoint.
+        """
         new_message = Message(
-            chat_room=chat_room_obj,
+            chat_room_id=room_id,
             sender=sender,
-            content=content
+            content=content or ''
         )
-        
-        if file_data and file_name and file_type:
-            try:
-                # Split the Base64 string to get just the data
-                format, imgstr = file_data.split(';base64,')
-                data = ContentFile(base64.b64decode(imgstr), name=file_name)
-                new_message.file = data
-                new_message.file_type = file_type
-                logger.info(f"Successfully decoded and attached file {file_name}")
-            except Exception as e:
-                logger.error(f"Error decoding Base64 file data: {e}")
 
-        new_message.save()
+        if attachment_id:
+            # A conditional UPDATE claims the attachment, so it can only ever be sent once.
+            attachment = ChatAttachment.objects.filter(
+                id=attachment_id,
+                chat_room_id=room_id,
+                uploader=sender,
+            )
+            if not await attachment.filter(status='uploaded').aupdate(status='attached'):
+                raise ValueError(f"Attachment {attachment_id} is not available.")
+            new_message.file, new_message.file_type = await attachment.values_list('file', 'file_type').aget()
+
+        try:
+            await new_message.asave()
+        except Exception:
+            if attachment_id:
+                await attachment.aupdate(status='uploaded')
+            raise
+        await atouch_room(new_message)
         return new_message
 
-    async def receive(self, text_data):
-        logger.info(text_data)
-        text_data_json = json.loads(text_data)
-        message_content = text_data_json.get('message')
-        file_data = text_data_json.get('file_data')
-        file_name = text_data_json.get('file_name')
-        file_type = text_data_json.get('file_type')
-        
-        if not message_content and not file_data:
-            logger.warning("Received empty message and no file.")
+    async def replay_missed(self, last_seen_id):
+        """
+        Sends every message after `last_seen_id` in one `replay` frame, so a
+        reconnecting client only fetches what it missed. Messages follow the
+        (timestamp, id) order of the history endpoint, so its `after` cursor
+        continues a truncated replay exactly. Runs after the group join, so
+        a message may arrive both live and in the replay; clients dedupe on
+        message_id.
+        """
+        try:
+            last_seen_id = int(last_seen_id)
+        except ValueError:
+            await self.send_content({
+                'type': 'error',
+                'message': 'last_seen_id must be an integer message id.'
+            })
             return
 
-        sender = self.scope["user"]
+        messages = Message.objects.filter(chat_room_id=self.room_id)
+        last_seen = await messages.filter(id=last_seen_id).values('timestamp').afirst()
+        if last_seen is not None:
+            messages = messages.filter(
+                Q(timestamp__gt=last_seen['timestamp']) | Q(timestamp=last_seen['timestamp'], id__gt=last_seen_id)
+            )
+        else:
+            # The last seen message is gone (archived or never saved).
+            messages = messages.filter(id__gt=last_seen_id)
 
-        try:
-            # Pass all the necessary data to the saving function
-            new_message = await self.save_message_with_media(
-                self.chat_room_obj, 
-                sender, 
-                message_content, 
-                file_data, 
-                file_name, 
-                file_type
+        limit = settings.CHAT_REPLAY_LIMIT
+        missed = [
+            message async for message in messages
+            .select_related('sender')
+            .order_by('timestamp', 'id')[:limit + 1]
+        ]
+
+        frame = {
+            'type': 'replay',
+            'chat_room_id': self.room_name,
+            'messages': [self.message_frame(message) for message in missed[:limit]],
+            # More than one frame's worth was missed: page the rest via history.
+            'has_more': len(missed) > limit,
+        }
+        if frame['has_more']:
+            last = missed[limit - 1]
+            # History cursor that continues right after the last replayed message.
+            frame['after'] = encode_cursor(last.timestamp, last.id)
+        await self.send_content(frame)
+
+    def message_frame(self, message, client_id=None):
+        frame = {
+            'type': 'chat_message',
+            'message_id': message.id,
+            'message': message.content,
+            'sender_id': message.sender.id,
+            'sender_username': message.sender.username,
+            'timestamp': message.timestamp.isoformat(),
+            'chat_room_id': self.room_name,
+            'client_id': client_id,
+        }
+
+        if message.file:
+            frame['file_url'] = message.file.url
+            frame['file_type'] = message.file_type
+        if message.thumbnail:
+            frame['thumbnail_url'] = message.thumbnail.url
+        return frame
+
+    async def receive_content(self, content):
+        if content.get('type') in EPHEMERAL_EVENTS:
+            await self.handle_ephemeral(content)
+            return
+
+        if content.get('type') == 'heartbeat':
+            await sync_to_async(mark_present, thread_sensitive=False)(
+                self.scope["user"].id, self.presence_scope, self.channel_name
             )
-            
-            self.chat_room_obj.updated_at = new_message.timestamp
-            await sync_to_async(self.chat_room_obj.save)()
-            
-            logger.info(f"Message saved from {sender.username} in room {self.room_name}")
-
-        except Exception as e:
-            logger.error(f"Error saving message to database: {e}")
-            await self.send(text_data=json.dumps({
+            return
+
+        # Everything below writes to the database; charge the sender and the room.
+        retry_after = await sync_to_async(take_message_token, thread_sensitive=False)(
+            self.scope["user"].id, self.room_id
+        )
+        if retry_after:
+            await self.send_content({
                 'type': 'error',
-                'message': 'Failed to save message. Please try again.'
-            }))
+                'code': 'rate_limited',
+                'client_id': content.get('client_id'),
+                'retry_after': retry_after,
+                'message': 'You are sending messages too fast. Please slow down.'
+            })
             return
 
-        recipient = (
-            self.chat_room_obj.mentor 
-            if sender == self.chat_room_obj.student 
-            else self.chat_room_obj.student
+        if content.get('type') == 'mark_read':
+            await self.handle_mark_read(content)
+            return
+
+        message_content = content.get('message')
+        attachment_id = content.get('attachment_id')
+
+        if content.get('file_data'):
+            await self.send_content({
+                'type': 'error',
+                'message': 'Inline file uploads are not supported. Upload the file first and send its attachment_id.'
+            })
+            return
+
+        if not message_content and not attachment_id:
+            logger.warning("Received empty message and no attachment.")
+            return
+
+        try:
+            attachment_id = uuid.UUID(str(attachment_id)) if attachment_id else None
+        except ValueError:
+            await self.send_content({
+                'type': 'error',
+                'message': 'Invalid attachment_id.'
+            })
+            return
+
+        sender = self.scope["user"]
+        client_id = content.get('client_id')
+        self.ephemeral.stopped_typing()
+
+        if settings.CHAT_WRITE_BEHIND and not attachment_id:
+            # Broadcast now, persist with the next buffer flush; the ack and the
+            # room's message_ids event follow the flush. The room matches them up
+            # by (sender_id, client_id), so make sure there is a client_id.
+            client_id = client_id or uuid.uuid4().hex
+            new_message = Message(
+                chat_room_id=self.room_id,
+                sender=sender,
+                content=message_content
+            )
+            message_buffer.add(new_message, reply_channel=self.channel_name, client_id=client_id)
+        else:
+            try:
+                new_message = await self.save_message(
+                    self.room_id,
+                    sender,
+                    message_content,
+                    attachment_id
+                )
+
+                logger.info(f"Message saved from {sender.username} in room {self.room_name}")
+
+            except Exception as e:
+                logger.error(f"Error saving message to database: {e}")
+                await self.send_content({
+                    'type': 'error',
+                    'client_id': client_id,
+                    'message': 'Failed to save message. Please try again.'
+                })
+                return
+
+            await self.chat_ack({
+                'client_id': client_id,
+                'message_id': new_message.id,
+                'timestamp': new_message.timestamp.isoformat(),
+                'persisted': True,
+            })
+
+        recipient_id = self.mentor_id if sender.id == self.student_id else self.student_id
+        await sync_to_async(record_unread_message, thread_sensitive=False)(
+            recipient_id,
+            sender.id,
+            self.room_id
         )
 
-        await sync_to_async(send_realtime_notification_task.delay)(
-        recipient_id=recipient.id,
-        sender_id=sender.id,
-        notification_type='message_received',
-        message=f"{sender.username} sent you a message.",
-        related_object_id=self.chat_room_obj.id,
-        related_object_type='ChatRoom'
-    )
-
-        response = {
-            'type': 'chat_message', 
-            'message': new_message.content, 
-            'sender_id': sender.id,
-            'sender_username': sender.username,
-            'timestamp': new_message.timestamp.isoformat(),
+        response = self.message_frame(new_message, client_id)
+
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'chat_message',
+                'chat_room_id': self.room_name,
+                'frame': encode_frame(response),
+            }
+        )
+
+    async def handle_mark_read(self, data):
+        """
+        Marks everything up to `up_to` as read for the connected user and
+        lets the room know, so the other participant can render receipts.
+        """
+        try:
+            up_to = int(data.get('up_to'))
+        except (TypeError, ValueError):
+            await self.send_content({
+                'type': 'error',
+                'message': 'mark_read requires an integer up_to message id.'
+            })
+            return
+
+        user = self.scope["user"]
+        marked, still_unread = await amark_room_read(self.room_id, user.id, up_to)
+
+        if marked:
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    'type': 'read_receipt',
+                    'frame': encode_frame({
+                        'type': 'read_receipt',
+                        'reader_id': user.id,
+                        'up_to': up_to,
+                        'chat_room_id': self.room_name,
+                    }),
+                }
+            )
+
+        await self.send_content({
+            'type': 'unread_count',
             'chat_room_id': self.room_name,
-        }
+            'unread': still_unread,
+        })
+
+    async def handle_ephemeral(self, data):
+        """
+        Typing indicators and delivered/seen acks. Over-limit frames are
+        dropped silently: these signals are lossy by nature.
+        """
+        if not self.ephemeral_bucket.consume():
+            return
+
+        if data['type'] == 'typing':
+            await self.ephemeral.typing(bool(data.get('is_typing')))
+            return
+
+        try:
+            message_id = int(data.get('message_id'))
+        except (TypeError, ValueError):
+            return
+        self.ephemeral.ack(data['type'], message_id)
 
-        if new_message.file:
-            response['file_url'] = new_message.file.url
-            response['file_type'] = new_message.file_type
-        
+    async def publish_ephemeral(self, event, payload):
         await self.channel_layer.group_send(
-            self.room_group_name, 
-            response
+            self.room_group_name,
+            {
+                'type': 'ephemeral_event',
+                'sender_channel': self.channel_name,
+                'frame': encode_frame({
+                    'type': event,
+                    'user_id': self.scope["user"].id,
+                    'chat_room_id': self.room_name,
+                    **payload,
+                }),
+            }
         )
 
+    async def ephemeral_event(self, event):
+        if event['sender_channel'] == self.channel_name:
+            return
+
+        await self.send_encoded(event['frame'])
+
+    async def read_receipt(self, event):
+        await self.send_encoded(event['frame'])
+
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps(event))
-        logger.info(f"Message sent to client in room {event.get('chat_room_id')}")
\ No newline at end of file
+        await self.send_encoded(event['frame'])
+        logger.info(f"Message sent to client in room {event.get('chat_room_id')}")
+
+    async def message_ids(self, event):
+        await self.send_encoded(event['frame'])
+
+    async def chat_ack(self, event):
+        """
+        Tells the sender that its message is durable (or that it was dropped).
+        """
+        await self.send_content({
+            'type': 'message_ack',
+            'client_id': event.get('client_id'),
+            'message_id': event['message_id'],
+            'timestamp': event['timestamp'],
+            'persisted': event['persisted'],
+        })
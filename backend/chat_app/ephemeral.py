@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+# Transient chat signals: relayed over the channel layer, never persisted.
+EPHEMERAL_EVENTS = ('typing', 'delivered', 'seen')
+
+
+class TokenBucket:
+    """
+    In-process token bucket: `rate` tokens per second, up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self, tokens=1):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+
+class EphemeralSignals:
+    """
+    Coalesces one connection's transient signals before they are broadcast.
+
+    Typing is only published when it changes, or every `typing_refresh`
+    seconds while it stays on. Delivered/seen acks only ever move forward and
+    are batched for `ack_delay` seconds, so acknowledging a burst of messages
+    publishes one event carrying the highest id.
+    """
+
+    def __init__(self, publish, typing_refresh, ack_delay):
+        self.publish = publish
+        self.typing_refresh = typing_refresh
+        self.ack_delay = ack_delay
+        self.is_typing = False
+        self.typing_sent_at = 0.0
+        self.pending_acks = {}
+        self.sent_acks = {}
+        self._flush_task = None
+
+    async def typing(self, is_typing):
+        now = time.monotonic()
+        if is_typing == self.is_typing and (not is_typing or now - self.typing_sent_at < self.typing_refresh):
+            return
+        self.is_typing = is_typing
+        self.typing_sent_at = now
+        await self.publish('typing', {'is_typing': is_typing})
+
+    def stopped_typing(self):
+        """Sending a message ends typing; receivers clear it on the message itself."""
+        self.is_typing = False
+
+    def ack(self, kind, message_id):
+        if message_id <= max(self.pending_acks.get(kind, 0), self.sent_acks.get(kind, 0)):
+            return
+        self.pending_acks[kind] = message_id
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.ack_delay)
+        await self.flush()
+
+    async def flush(self):
+        self._flush_task = None
+        pending, self.pending_acks = self.pending_acks, {}
+        for kind, up_to in pending.items():
+            self.sent_acks[kind] = up_to
+            await self.publish(kind, {'up_to': up_to})
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        await self.typing(False)
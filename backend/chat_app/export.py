@@ -0,0 +1,118 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+
+from .archive import load_archive
+from .models import Message, MessageArchive
+
+EXPORT_FIELDS = (
+    'id', 'timestamp', 'sender_id', 'sender_username', 'content',
+    'attachment_url', 'attachment_type',
+)
+
+# Rows fetched per database round trip, and rows written per response chunk.
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_WRITE_BATCH = 500
+
+
+def _export_row(pk, timestamp, sender_id, sender_username, content, file, file_type):
+    return {
+        'id': pk,
+        'timestamp': timestamp.isoformat(),
+        'sender_id': sender_id,
+        'sender_username': sender_username,
+        'content': content,
+        'attachment_url': default_storage.url(file) if file else None,
+        'attachment_type': file_type,
+    }
+
+
+async def _archived_rows(room_id):
+    archives = [
+        archive async for archive in
+        MessageArchive.objects.filter(chat_room_id=room_id).order_by('month')
+    ]
+    for archive in archives:
+        records = load_archive(archive)
+        try:
+            while True:
+                batch = await sync_to_async(list)(islice(records, EXPORT_CHUNK_SIZE))
+                if not batch:
+                    break
+                for record in batch:
+                    yield _export_row(
+                        record['id'], record['timestamp'], record['sender'], record['sender_username'],
+                        record['content'], record['file'], record['file_type'],
+                    )
+        finally:
+            await sync_to_async(records.close)()
+
+
+async def transcript_rows(room_id):
+    """
+    Yields every message of a room as an export row, oldest first: archived
+    months from storage, then the messages still in the database. Both are
+    read in chunks, so memory use does not depend on the size of the room.
+    """
+    async for row in _archived_rows(room_id):
+        yield row
+
+    messages = (
+        Message.objects
+        .filter(chat_room_id=room_id)
+        .order_by('timestamp', 'id')
+        .values('id', 'timestamp', 'sender_id', 'sender__username', 'content', 'file', 'file_type')
+    )
+    async for row in messages.aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield _export_row(
+            row['id'], row['timestamp'], row['sender_id'], row['sender__username'],
+            row['content'], row['file'], row['file_type'],
+        )
+
+
+async def _batched(lines):
+    batch = []
+    async for line in lines:
+        batch.append(line)
+        if len(batch) >= EXPORT_WRITE_BATCH:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+async def _ndjson_lines(rows):
+    async for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+async def _csv_lines(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    async for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_stream(rows):
+    return _batched(_ndjson_lines(rows))
+
+
+def csv_stream(rows):
+    return _batched(_csv_lines(rows))
+
+
+# output query value -> (content type, stream builder)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', ndjson_stream),
+    'csv': ('text/csv', csv_stream),
+}
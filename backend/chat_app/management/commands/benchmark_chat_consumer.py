@@ -0,0 +1,100 @@
+import asyncio
+import time
+import uuid
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from chat_app.models import ChatRoom
+from chat_app.routing import websocket_urlpatterns
+
+User = get_user_model()
+
+
+class AsUser:
+    """Puts a fixed user in the scope, standing in for the JWT middleware."""
+
+    def __init__(self, app, user):
+        self.app = app
+        self.user = user
+
+    async def __call__(self, scope, receive, send):
+        scope['user'] = self.user
+        return await self.app(scope, receive, send)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures chat messages per second a single process can accept, "
+        "persist and broadcast through ChatConsumer. Creates throwaway users "
+        "and rooms in the configured database and deletes them afterwards; "
+        "Redis must be reachable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=20, help="Concurrent chat rooms (two sockets each).")
+        parser.add_argument('--messages', type=int, default=50, help="Messages sent per room.")
+
+    def handle(self, *args, **options):
+        # Measure throughput, not the per-user and per-room rate limits.
+        for name in ('CHAT_USER_MESSAGE_RATE', 'CHAT_USER_MESSAGE_BURST', 'CHAT_ROOM_MESSAGE_RATE', 'CHAT_ROOM_MESSAGE_BURST'):
+            setattr(settings, name, 10 ** 6)
+
+        users, rooms = self.create_fixtures(options['rooms'])
+        try:
+            elapsed = asyncio.run(self.run(rooms, options['messages']))
+        finally:
+            ChatRoom.objects.filter(id__in=[room.id for room in rooms]).delete()
+            User.objects.filter(id__in=[user.id for user in users]).delete()
+
+        total = len(rooms) * options['messages']
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} messages in {elapsed:.2f}s: {total / elapsed:.0f} messages/sec"
+        ))
+
+    def create_fixtures(self, count):
+        tag = uuid.uuid4().hex[:8]
+        users, rooms = [], []
+        for index in range(count):
+            student = User.objects.create_user(
+                email=f"bench-s{index}-{tag}@example.com", username=f"bench_s{index}_{tag}",
+                password=None, role='student'
+            )
+            mentor = User.objects.create_user(
+                email=f"bench-m{index}-{tag}@example.com", username=f"bench_m{index}_{tag}",
+                password=None, role='mentor'
+            )
+            users += [student, mentor]
+            rooms.append(ChatRoom.objects.create(student=student, mentor=mentor))
+        return users, rooms
+
+    async def run(self, rooms, messages):
+        app = URLRouter(websocket_urlpatterns)
+        pairs = []
+        for room in rooms:
+            sender = WebsocketCommunicator(AsUser(app, room.student), f"/ws/chat/{room.id}/")
+            receiver = WebsocketCommunicator(AsUser(app, room.mentor), f"/ws/chat/{room.id}/")
+            await sender.connect()
+            await receiver.connect()
+            pairs.append((sender, receiver))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(self.converse(sender, receiver, messages) for sender, receiver in pairs))
+        elapsed = time.perf_counter() - start
+
+        for sender, receiver in pairs:
+            await sender.disconnect()
+            await receiver.disconnect()
+        return elapsed
+
+    async def converse(self, sender, receiver, messages):
+        for index in range(messages):
+            await sender.send_json_to({'message': f"benchmark message {index}", 'client_id': str(index)})
+        # Every message yields an ack and a broadcast for the sender, and a broadcast for the receiver.
+        for _ in range(messages * 2):
+            await sender.receive_output(timeout=30)
+        for _ in range(messages):
+            await receiver.receive_output(timeout=30)
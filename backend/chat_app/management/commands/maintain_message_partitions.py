@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from chat_app.archive import (add_months, archive_month, ensure_partitions,
+                              list_partitions)
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates upcoming monthly partitions of the chat messages table and "
+        "archives partitions older than CHAT_MESSAGE_HOT_MONTHS to storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=settings.CHAT_MESSAGE_PARTITIONS_AHEAD,
+            help="Number of future monthly partitions to keep created."
+        )
+        parser.add_argument(
+            '--hot-months', type=int, default=settings.CHAT_MESSAGE_HOT_MONTHS,
+            help="Months of history to keep in the database; older partitions are archived."
+        )
+        parser.add_argument(
+            '--no-archive', action='store_true',
+            help="Only create partitions, do not archive anything."
+        )
+        parser.add_argument(
+            '--keep-detached', action='store_true',
+            help="Leave archived partitions as detached tables instead of dropping them."
+        )
+
+    def handle(self, *args, **options):
+        created = ensure_partitions(options['ahead'])
+        self.stdout.write(f"Ensured partitions: {', '.join(created)}")
+
+        if options['no_archive']:
+            return
+
+        cutoff = add_months(timezone.now().date().replace(day=1), -options['hot_months'])
+        for month, partition in sorted(list_partitions().items()):
+            if month >= cutoff:
+                continue
+            archived = archive_month(month, keep_detached=options['keep_detached'])
+            self.stdout.write(self.style.SUCCESS(f"Archived {archived} messages from {partition}"))
@@ -0,0 +1,82 @@
+from django.db import migrations
+
+# Converts chat_app_message into a table range-partitioned by month on
+# "timestamp". Postgres requires the partition key in the primary key, so the
+# table's key becomes (id, timestamp); ids still come from a single sequence
+# and stay unique, which is all the ORM relies on. Monthly partitions are
+# created by chat_app_ensure_message_partition(), which the
+# maintain_message_partitions command calls ahead of time; anything outside
+# the managed range lands in the default partition.
+
+ENSURE_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION chat_app_ensure_message_partition(month_start date) RETURNS text AS $$
+DECLARE
+    partition_name text := format('chat_app_message_p%s', to_char(month_start, 'YYYYMM'));
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF chat_app_message FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        date_trunc('month', month_start)::timestamp AT TIME ZONE 'UTC',
+        (date_trunc('month', month_start) + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+    );
+    RETURN partition_name;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+PARTITION_MESSAGES = """
+ALTER TABLE chat_app_message RENAME TO chat_app_message_unpartitioned;
+ALTER INDEX chat_app_message_pkey RENAME TO chat_app_message_unpartitioned_pkey;
+ALTER TABLE chat_app_message_unpartitioned ALTER COLUMN id DROP IDENTITY;
+DROP INDEX chat_msg_room_ts_id_idx, chat_msg_room_unread_idx, chat_msg_search_idx;
+
+CREATE TABLE chat_app_message (
+    LIKE chat_app_message_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED
+) PARTITION BY RANGE ("timestamp");
+
+CREATE SEQUENCE chat_app_message_id_seq OWNED BY chat_app_message.id;
+SELECT setval(
+    'chat_app_message_id_seq',
+    COALESCE((SELECT MAX(id) FROM chat_app_message_unpartitioned), 0) + 1,
+    false
+);
+ALTER TABLE chat_app_message ALTER COLUMN id SET DEFAULT nextval('chat_app_message_id_seq');
+
+ALTER TABLE chat_app_message ADD CONSTRAINT chat_app_message_pkey PRIMARY KEY (id, "timestamp");
+ALTER TABLE chat_app_message ADD CONSTRAINT chat_app_message_chat_room_id_fk_chat_app_chatroom_id
+    FOREIGN KEY (chat_room_id) REFERENCES chat_app_chatroom (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE chat_app_message ADD CONSTRAINT chat_app_message_sender_id_fk_users_user_id
+    FOREIGN KEY (sender_id) REFERENCES users_user (id) DEFERRABLE INITIALLY DEFERRED;
+
+CREATE INDEX chat_msg_room_ts_id_idx ON chat_app_message (chat_room_id, "timestamp", id);
+CREATE INDEX chat_msg_room_unread_idx ON chat_app_message (chat_room_id, id) WHERE NOT is_read;
+CREATE INDEX chat_msg_search_idx ON chat_app_message USING gin (search_vector);
+CREATE INDEX chat_msg_sender_idx ON chat_app_message (sender_id);
+
+SELECT chat_app_ensure_message_partition(month::date)
+FROM generate_series(
+    date_trunc('month', COALESCE((SELECT MIN("timestamp") FROM chat_app_message_unpartitioned), now()) AT TIME ZONE 'UTC'),
+    date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months',
+    interval '1 month'
+) AS month;
+CREATE TABLE chat_app_message_default PARTITION OF chat_app_message DEFAULT;
+
+INSERT INTO chat_app_message (id, content, "timestamp", is_read, chat_room_id, sender_id, file, file_type)
+SELECT id, content, "timestamp", is_read, chat_room_id, sender_id, file, file_type
+FROM chat_app_message_unpartitioned;
+
+DROP TABLE chat_app_message_unpartitioned;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_app', '0008_message_search_vector'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(ENSURE_PARTITION_FUNCTION, "DROP FUNCTION chat_app_ensure_message_partition(date);"),
+        migrations.RunSQL(PARTITION_MESSAGES),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_app', '0009_partition_message_by_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the archived month.')),
+                ('file', models.FileField(max_length=255, upload_to='chat_archive/')),
+                ('message_count', models.PositiveIntegerField()),
+                ('oldest_at', models.DateTimeField()),
+                ('newest_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('chat_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='message_archives', to='chat_app.chatroom')),
+            ],
+            options={
+                'verbose_name': 'Message Archive',
+                'verbose_name_plural': 'Message Archives',
+                'ordering': ['-month'],
+                'unique_together': {('chat_room', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat_app', '0011_message_room_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='thumbnail',
+            field=models.FileField(blank=True, max_length=255, null=True, upload_to='chat_thumbnails/'),
+        ),
+    ]
@@ -1,5 +1,10 @@
+import uuid
+
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 
 class ChatRoom(models.Model):
@@ -24,6 +29,20 @@ class ChatRoom(models.Model):
     created_at = models.DateTimeField(auto_now_add=True,)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized copy of the latest message, kept in sync on send so the
+    # inbox can be listed without touching the messages table.
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=255, blank=True, default='')
+    last_message_sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="The user who sent the latest message in this chat room."
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         """
         Meta options for the ChatRoom model.
@@ -60,11 +79,22 @@ class Message(models.Model):
     )
     
     content = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the message is built rather than on insert, so write-behind
+    # batches keep the timestamp that was broadcast to the room.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     is_read = models.BooleanField(default=False)
 
     file = models.FileField(upload_to='chat_media/', blank=True, null=True)
     file_type = models.CharField(max_length=50, blank=True, null=True)
+    # Bounded-size WebP preview of an image attachment, filled in by a Celery task.
+    thumbnail = models.FileField(upload_to='chat_thumbnails/', max_length=255, blank=True, null=True)
+
+    # Maintained by Postgres on insert/update; backs full-text message search.
+    search_vector = models.GeneratedField(
+        expression=SearchVector('content', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         """
@@ -73,9 +103,103 @@ class Message(models.Model):
         verbose_name = "Message"
         verbose_name_plural = "Messages"
         ordering = ['timestamp']
+        indexes = [
+            # Backs keyset pagination of a room's history on (timestamp, id).
+            models.Index(fields=['chat_room', 'timestamp', 'id'], name='chat_msg_room_ts_id_idx'),
+            # Reconnect catch-up: messages of a room after a last-seen id.
+            models.Index(fields=['chat_room', 'id'], name='chat_msg_room_id_idx'),
+            # Keeps read-receipt updates proportional to what is actually unread.
+            models.Index(
+                fields=['chat_room', 'id'],
+                condition=models.Q(is_read=False),
+                name='chat_msg_room_unread_idx'
+            ),
+            GinIndex(fields=['search_vector'], name='chat_msg_search_idx'),
+        ]
 
     def __str__(self):
         """
         String representation of the Message object.
         """
         return f"Message from {self.sender.username} in {self.chat_room} at {self.timestamp.strftime('%Y-%m-%d %H:%M')}: {self.content[:50]}..."
+
+
+
+class ChatAttachment(models.Model):
+    """
+    A file uploaded out-of-band, directly to storage, for use in a chat room.
+    Chat messages reference an attachment by id instead of carrying the file
+    inside the WebSocket frame.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('uploaded', 'Uploaded'),
+        ('attached', 'Attached'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    chat_room = models.ForeignKey(
+        ChatRoom,
+        on_delete=models.CASCADE,
+        related_name='attachments'
+    )
+    uploader = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='chat_attachments',
+        help_text="The user who uploaded this attachment."
+    )
+
+    file = models.FileField(upload_to='chat_media/', max_length=255)
+    file_name = models.CharField(max_length=255)
+    file_type = models.CharField(max_length=50)
+    size = models.PositiveBigIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """
+        Meta options for the ChatAttachment model.
+        """
+        verbose_name = "Chat Attachment"
+        verbose_name_plural = "Chat Attachments"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        """
+        String representation of the ChatAttachment object.
+        """
+        return f"{self.file_name} ({self.status}) in {self.chat_room_id}"
+
+
+class MessageArchive(models.Model):
+    """
+    One month of a chat room's history that was exported to compressed JSONL
+    in storage and removed from the hot messages table.
+    """
+    chat_room = models.ForeignKey(
+        ChatRoom,
+        on_delete=models.CASCADE,
+        related_name='message_archives'
+    )
+    month = models.DateField(help_text="First day of the archived month.")
+    file = models.FileField(upload_to='chat_archive/', max_length=255)
+    message_count = models.PositiveIntegerField()
+    oldest_at = models.DateTimeField()
+    newest_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """
+        Meta options for the MessageArchive model.
+        """
+        unique_together = ('chat_room', 'month')
+        verbose_name = "Message Archive"
+        verbose_name_plural = "Message Archives"
+        ordering = ['-month']
+
+    def __str__(self):
+        """
+        String representation of the MessageArchive object.
+        """
+        return f"Archive of {self.chat_room_id} for {self.month:%Y-%m} ({self.message_count} messages)"
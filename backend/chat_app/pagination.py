@@ -0,0 +1,171 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+def encode_cursor(timestamp, pk):
+    """
+    Encodes a (timestamp, id) position into an opaque, URL-safe cursor.
+    """
+    raw = f"{timestamp.isoformat()}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor produced by `encode_cursor` back into (timestamp, id).
+    Raises NotFound for anything that was not produced by us.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        timestamp, pk = raw.split('|', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeError):
+        raise NotFound("Invalid cursor.")
+
+
+class MessageKeysetPagination(BasePagination):
+    """
+    Keyset pagination for chat history on (timestamp, id).
+
+    Pages are always returned newest-first. Without a cursor the latest page
+    is returned; `before` walks back into older history and `after` fetches
+    messages newer than a previously seen position. Every page is a single
+    index range scan on (chat_room, timestamp, id), so the cost of a page does
+    not depend on how old the room is.
+    """
+    page_size = 50
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    before_query_param = 'before'
+    after_query_param = 'after'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        before = request.query_params.get(self.before_query_param)
+        after = request.query_params.get(self.after_query_param)
+
+        if after:
+            timestamp, pk = decode_cursor(after)
+            queryset = queryset.filter(
+                Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)
+            ).order_by('timestamp', 'id')
+            rows = list(queryset[:self.page_size + 1])
+            self.has_newer = len(rows) > self.page_size
+            self.has_older = True
+            page = rows[:self.page_size][::-1]
+        else:
+            if before:
+                timestamp, pk = decode_cursor(before)
+                queryset = queryset.filter(
+                    Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk)
+                )
+            queryset = queryset.order_by('-timestamp', '-id')
+            rows = list(queryset[:self.page_size + 1])
+            self.has_older = len(rows) > self.page_size
+            self.has_newer = bool(before)
+            page = rows[:self.page_size]
+
+        self.page = page
+        self.request_after = after
+        return page
+
+    def get_before_cursor(self):
+        if not self.page or not self.has_older:
+            return None
+        oldest = self.page[-1]
+        return encode_cursor(oldest.timestamp, oldest.id)
+
+    def get_after_cursor(self):
+        if not self.page:
+            # Nothing newer yet; hand the caller's position back so polling can resume from it.
+            return self.request_after or None
+        newest = self.page[0]
+        return encode_cursor(newest.timestamp, newest.id)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'before': self.get_before_cursor(),
+            'after': self.get_after_cursor(),
+            'has_newer': self.has_newer,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'before': {'type': 'string', 'nullable': True},
+                'after': {'type': 'string', 'nullable': True},
+                'has_newer': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+
+def encode_rank_cursor(rank, pk):
+    raw = f"{rank!r}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_rank_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        rank, pk = raw.split('|', 1)
+        return float(rank), int(pk)
+    except (ValueError, UnicodeError):
+        raise NotFound("Invalid cursor.")
+
+
+class MessageSearchPagination(BasePagination):
+    """
+    Keyset pagination over search results ordered by (rank, id) descending.
+    Expects the queryset to be annotated with `rank`.
+    """
+    page_size = 20
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            rank, pk = decode_rank_cursor(cursor)
+            queryset = queryset.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=pk))
+
+        rows = list(queryset.order_by('-rank', '-id')[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_cursor(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return encode_rank_cursor(last.rank, last.id)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_cursor(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
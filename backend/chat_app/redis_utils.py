@@ -0,0 +1,91 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+
+
+def get_redis():
+    return get_redis_connection("default")
+
+
+def unread_key(user_id):
+    return f"chat:unread:{user_id}"
+
+
+def increment_unread(user_id, room_id, amount=1):
+    """Bumps the unread badge of one room for a user."""
+    get_redis().hincrby(unread_key(user_id), room_id, amount)
+
+
+def set_unread(user_id, room_id, count):
+    """Overwrites the unread badge of one room; zero removes the field."""
+    if count:
+        get_redis().hset(unread_key(user_id), room_id, count)
+    else:
+        get_redis().hdel(unread_key(user_id), room_id)
+
+
+def get_unread_counts(user_id):
+    """Returns {room_id: unread_count} for every room with unread messages."""
+    return {
+        int(room_id): int(count)
+        for room_id, count in get_redis().hgetall(unread_key(user_id)).items()
+    }
+
+
+# Token buckets stored as hashes {tokens, ts}. A frame takes one token from
+# every bucket or from none; returns 0 when allowed, otherwise the number of
+# milliseconds until every bucket has a token again.
+# ARGV: rate and capacity per key, in key order.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local capacity = tonumber(ARGV[i * 2])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(bucket[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+    available = math.min(capacity, available + elapsed * rate / 1000)
+    if available < 1 then
+        wait = math.max(wait, math.ceil((1 - available) * 1000 / rate))
+    end
+    tokens[i] = available
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local capacity = tonumber(ARGV[i * 2])
+    if wait == 0 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens[i]), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity * 1000 / rate))
+end
+return wait
+"""
+
+_token_bucket = None
+
+
+def rate_limit_key(scope, scope_id):
+    return f"chat:ratelimit:{scope}:{scope_id}"
+
+
+def take_message_token(user_id, room_id):
+    """
+    Charges one chat frame against the sender's and the room's token
+    buckets. Returns 0 if the frame may go through, otherwise how many
+    seconds to wait before retrying.
+    """
+    global _token_bucket
+    if _token_bucket is None:
+        _token_bucket = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+
+    wait_ms = _token_bucket(
+        keys=[rate_limit_key('user', user_id), rate_limit_key('room', room_id)],
+        args=[
+            settings.CHAT_USER_MESSAGE_RATE, settings.CHAT_USER_MESSAGE_BURST,
+            settings.CHAT_ROOM_MESSAGE_RATE, settings.CHAT_ROOM_MESSAGE_BURST,
+        ],
+    )
+    return wait_ms / 1000
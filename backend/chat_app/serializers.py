@@ -1,20 +1,130 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 
-from chat_app.models import ChatRoom, Message
+from chat_app.models import ChatAttachment, ChatRoom, Message
 from users.models import User
 
 
 class MessageSerializer(serializers.ModelSerializer):
     sender_username = serializers.SerializerMethodField()
     sender_id = serializers.ReadOnlyField(source='sender.id')
+    thumbnail_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
-        fields = ['id', 'chat_room', 'sender', 'sender_id', 'sender_username', 'content', 'timestamp', 'is_read','file_type','file']
-        read_only_fields = ['id', 'chat_room', 'sender', 'sender_id', 'sender_username', 'timestamp']
+        fields = ['id', 'chat_room', 'sender', 'sender_id', 'sender_username', 'content', 'timestamp', 'is_read','file_type','file', 'thumbnail_url']
+        read_only_fields = ['id', 'chat_room', 'sender', 'sender_id', 'sender_username', 'timestamp', 'thumbnail_url']
 
     def get_sender_username(self, obj):
         """
         Returns the username of the message sender.
         """
         return obj.sender.username
+
+    def get_thumbnail_url(self, obj):
+        """
+        URL of the WebP preview of an image attachment, or None until it exists.
+        """
+        return obj.thumbnail.url if obj.thumbnail else None
+
+
+class ArchivedMessageSerializer(serializers.Serializer):
+    """
+    Renders an archived message record (see chat_app.archive) in the same
+    shape as MessageSerializer.
+    """
+    id = serializers.IntegerField()
+    chat_room = serializers.IntegerField()
+    sender = serializers.IntegerField()
+    sender_id = serializers.IntegerField(source='sender')
+    sender_username = serializers.CharField()
+    content = serializers.CharField()
+    timestamp = serializers.DateTimeField()
+    is_read = serializers.BooleanField()
+    file_type = serializers.CharField(allow_null=True)
+    file = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+
+    def get_file(self, obj):
+        return default_storage.url(obj['file']) if obj['file'] else None
+
+    def get_thumbnail_url(self, obj):
+        # Archives written before thumbnails existed have no such key.
+        return default_storage.url(obj['thumbnail']) if obj.get('thumbnail') else None
+
+
+class MessageSearchResultSerializer(MessageSerializer):
+    headline = serializers.CharField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(MessageSerializer.Meta):
+        fields = MessageSerializer.Meta.fields + ['headline', 'rank']
+
+
+class ChatAttachmentCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChatAttachment
+        fields = ['file_name', 'file_type', 'size']
+
+    def validate_size(self, value):
+        if value < 1 or value > settings.CHAT_ATTACHMENT_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Attachment size must be between 1 and {settings.CHAT_ATTACHMENT_MAX_SIZE} bytes."
+            )
+        return value
+
+
+class ChatAttachmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChatAttachment
+        fields = ['id', 'chat_room', 'file_name', 'file_type', 'size', 'status', 'file', 'created_at']
+        read_only_fields = fields
+
+
+class MarkReadSerializer(serializers.Serializer):
+    up_to = serializers.IntegerField(min_value=1)
+
+
+class ChatInboxSerializer(serializers.ModelSerializer):
+    """
+    One inbox row: the room, the other participant, the latest message and
+    the requesting user's unread count. Expects `request` and `unread_counts`
+    in the serializer context.
+    """
+    counterpart = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChatRoom
+        fields = ['id', 'counterpart', 'last_message', 'unread_count', 'updated_at']
+
+    def get_counterpart(self, obj):
+        user = self.context['request'].user
+        if obj.student_id == user.id:
+            counterpart, profile_attr = obj.mentor, 'mentor_profile'
+        else:
+            counterpart, profile_attr = obj.student, 'student_profile'
+
+        profile = getattr(counterpart, profile_attr, None)
+        picture = profile.profile_picture if profile else None
+        return {
+            'id': counterpart.id,
+            'username': counterpart.username,
+            'role': counterpart.role,
+            'profile_picture': picture.url if picture else None,
+        }
+
+    def get_last_message(self, obj):
+        if obj.last_message_id is None:
+            return None
+        return {
+            'id': obj.last_message_id,
+            'preview': obj.last_message_preview,
+            'sender_id': obj.last_message_sender_id,
+            'timestamp': obj.last_message_at,
+        }
+
+    def get_unread_count(self, obj):
+        return self.context.get('unread_counts', {}).get(obj.id, 0)
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_room_participants
+from .models import ChatRoom, Message
+from .tasks import generate_message_thumbnail
+
+
+@receiver(post_save, sender=ChatRoom)
+def invalidate_participants_on_save(sender, instance, created, update_fields=None, **kwargs):
+    # Bumping updated_at on every message does not change who is in the room.
+    if created or (update_fields and set(update_fields) <= {'updated_at'}):
+        return
+    invalidate_room_participants(instance.id)
+
+
+@receiver(post_delete, sender=ChatRoom)
+def invalidate_participants_on_delete(sender, instance, **kwargs):
+    invalidate_room_participants(instance.id)
+
+
+@receiver(post_save, sender=Message)
+def queue_message_thumbnail(sender, instance, created, **kwargs):
+    if created and instance.file and (instance.file_type or '').startswith('image/'):
+        transaction.on_commit(lambda: generate_message_thumbnail.delay(instance.id))
@@ -0,0 +1,55 @@
+import io
+import logging
+
+from celery import shared_task
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+
+from .models import Message
+from .thumbnails import build_thumbnail, thumbnail_name
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def maintain_message_partitions():
+    """
+    Keeps future message partitions created and archives cold ones.
+    """
+    from django.core.management import call_command
+    call_command('maintain_message_partitions')
+
+
+@shared_task(bind=True)
+def generate_message_thumbnail(self, message_id):
+    """
+    Stores a WebP thumbnail of a message's image attachment and records its
+    key on the message, so history loads fetch kilobytes instead of the
+    original upload.
+    """
+    message = Message.objects.filter(id=message_id).only('id', 'file', 'file_type', 'thumbnail').first()
+    if message is None or not message.file or message.thumbnail:
+        return
+
+    # Only storage errors are retried; a file that does not decode never will.
+    try:
+        with default_storage.open(message.file.name, 'rb') as fh:
+            original = fh.read()
+    except Exception as exc:
+        logger.error(f"Reading attachment of message {message_id} failed: {exc}")
+        self.retry(exc=exc, countdown=60, max_retries=3)
+
+    try:
+        data = build_thumbnail(io.BytesIO(original))
+    except (UnidentifiedImageError, Image.DecompressionBombError, ValueError, OSError) as e:
+        logger.warning(f"No thumbnail for message {message_id}: {e}")
+        return
+
+    try:
+        name = default_storage.save(thumbnail_name(message.file.name), ContentFile(data))
+    except Exception as exc:
+        logger.error(f"Storing thumbnail of message {message_id} failed: {exc}")
+        self.retry(exc=exc, countdown=60, max_retries=3)
+
+    Message.objects.filter(id=message_id).update(thumbnail=name)
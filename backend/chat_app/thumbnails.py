@@ -0,0 +1,38 @@
+import io
+import posixpath
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+def thumbnail_name(file_name):
+    """
+    Storage name of the thumbnail for an attachment, e.g.
+    chat_media/<hex>/photo.jpg -> chat_thumbnails/<hex>/photo.webp
+    """
+    directory, base = posixpath.split(file_name)
+    stem = posixpath.splitext(base)[0]
+    return f"chat_thumbnails/{posixpath.basename(directory)}/{stem}.webp"
+
+
+def build_thumbnail(fh):
+    """
+    Reads an image from `fh` and returns WebP bytes that fit within
+    CHAT_THUMBNAIL_SIZE. Raises PIL.UnidentifiedImageError,
+    Image.DecompressionBombError, ValueError or OSError (e.g. for truncated
+    files) when the file is not a usable image.
+    """
+    size = settings.CHAT_THUMBNAIL_SIZE
+    with Image.open(fh) as image:
+        # Lets JPEG decode at a reduced scale instead of full resolution.
+        image.draft('RGB', size)
+        image = ImageOps.exif_transpose(image)
+        # Resampling does not support every mode (16-bit grayscale, for one),
+        # so convert to what WebP stores first.
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        image.thumbnail(size)
+
+        out = io.BytesIO()
+        image.save(out, format='WEBP', quality=settings.CHAT_THUMBNAIL_QUALITY)
+    return out.getvalue()
@@ -1,7 +1,17 @@
 from django.urls import path
 
-from .views import ChatRoomMessageListView
+from .views import (ChatAttachmentCompleteView, ChatAttachmentCreateView,
+                    ChatInboxView, ChatRoomExportView, ChatRoomMarkReadView,
+                    ChatMessageSearchView, ChatRoomMessageListView,
+                    ChatUnreadCountsView)
 
 urlpatterns = [
+    path('rooms/', ChatInboxView.as_view(), name='chat-inbox'),
     path('rooms/<int:room_id>/messages/', ChatRoomMessageListView.as_view(), name='chat-room-messages'),
+    path('rooms/<int:room_id>/attachments/', ChatAttachmentCreateView.as_view(), name='chat-attachment-create'),
+    path('rooms/<int:room_id>/export/', ChatRoomExportView.as_view(), name='chat-room-export'),
+    path('rooms/<int:room_id>/read/', ChatRoomMarkReadView.as_view(), name='chat-room-mark-read'),
+    path('search/', ChatMessageSearchView.as_view(), name='chat-message-search'),
+    path('unread/', ChatUnreadCountsView.as_view(), name='chat-unread-counts'),
+    path('attachments/<uuid:attachment_id>/complete/', ChatAttachmentCompleteView.as_view(), name='chat-attachment-complete'),
 ]
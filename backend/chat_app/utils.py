@@ -0,0 +1,71 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from .models import ChatRoom, Message
+from .redis_utils import set_unread
+
+LAST_MESSAGE_PREVIEW_LENGTH = 255
+
+
+def last_message_fields(message):
+    """
+    Returns the ChatRoom columns to update when `message` becomes the latest
+    message of its room.
+    """
+    preview = message.content or ('Attachment' if message.file else '')
+    return {
+        'updated_at': message.timestamp,
+        'last_message_id': message.id,
+        'last_message_preview': preview[:LAST_MESSAGE_PREVIEW_LENGTH],
+        'last_message_sender_id': message.sender_id,
+        'last_message_at': message.timestamp,
+    }
+
+
+def _rooms_older_than(message):
+    # Write-behind can flush an older text message after a newer attachment
+    # was written through; it must not replace the newer last message.
+    return ChatRoom.objects.filter(id=message.chat_room_id).filter(
+        Q(last_message_at__isnull=True) | Q(last_message_at__lt=message.timestamp)
+    )
+
+
+def touch_room(message):
+    """
+    Bumps the room's updated_at and denormalized last message in one UPDATE,
+    unless the room already shows a newer message.
+    """
+    _rooms_older_than(message).update(**last_message_fields(message))
+
+
+async def atouch_room(message):
+    await _rooms_older_than(message).aupdate(**last_message_fields(message))
+
+
+def mark_room_read(room_id, user_id, up_to_id):
+    """
+    Marks every message the other participant sent in a room, up to and
+    including `up_to_id`, as read with a single UPDATE, and resets the
+    user's unread counter for the room to whatever is still unread after it.
+    Returns (marked, still_unread).
+    """
+    unread = Message.objects.filter(chat_room_id=room_id, is_read=False).exclude(sender_id=user_id)
+
+    marked = unread.filter(id__lte=up_to_id).update(is_read=True)
+    still_unread = unread.filter(id__gt=up_to_id).count()
+    set_unread(user_id, room_id, still_unread)
+
+    return marked, still_unread
+
+
+async def amark_room_read(room_id, user_id, up_to_id):
+    """
+    Async counterpart of `mark_room_read` for the WebSocket consumers.
+    """
+    unread = Message.objects.filter(chat_room_id=room_id, is_read=False).exclude(sender_id=user_id)
+
+    marked = await unread.filter(id__lte=up_to_id).aupdate(is_read=True)
+    still_unread = await unread.filter(id__gt=up_to_id).acount()
+    await sync_to_async(set_unread, thread_sensitive=False)(user_id, room_id, still_unread)
+
+    return marked, still_unread
@@ -1,26 +1,49 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.postgres.search import (SearchHeadline, SearchQuery,
+                                           SearchRank)
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema  # <<< ADD THIS IMPORT
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from auth.authentication import CookieJWTAuthentication
-from chat_app.models import ChatRoom, Message
+from chat_app.models import ChatAttachment, ChatRoom, Message
+from config.frames import encode_frame
 
-from .serializers import MessageSerializer
+from .archive import read_archived_messages
+from .attachments import (build_attachment_name, generate_presigned_upload,
+                          verify_uploaded)
+from .export import EXPORT_FORMATS, transcript_rows
+from .pagination import (MessageKeysetPagination, MessageSearchPagination,
+                         decode_cursor, encode_cursor)
+from .redis_utils import get_unread_counts
+from .serializers import (ArchivedMessageSerializer,
+                          ChatAttachmentCreateSerializer,
+                          ChatAttachmentSerializer, ChatInboxSerializer,
+                          MarkReadSerializer, MessageSearchResultSerializer,
+                          MessageSerializer)
+from .utils import mark_room_read
 
 
 class ChatRoomMessageListView(generics.ListAPIView):
     """
-    API endpoint to list all messages for a specific chat room.
+    API endpoint to list the messages of a specific chat room, newest first,
+    using `before`/`after` keyset cursors (see MessageKeysetPagination).
     Requires authentication and ensures the requesting user is a participant
     in the specified chat room.
     """
     serializer_class = MessageSerializer
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
-    pagination_class = None
+    pagination_class = MessageKeysetPagination
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -44,4 +67,256 @@ class ChatRoomMessageListView(generics.ListAPIView):
                 message="You are not authorized to view messages in this chat room."
             )
 
-        return Message.objects.filter(chat_room=chat_room).order_by('timestamp')
+        return Message.objects.filter(chat_room=chat_room).select_related('sender')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        paginator = self.paginator
+
+        # Older history may have been moved to the cold archive; once the hot
+        # table runs out, continue the page from there with the same cursor.
+        if paginator.has_older or request.query_params.get(paginator.after_query_param):
+            return response
+
+        if paginator.page:
+            oldest = paginator.page[-1]
+            position = (oldest.timestamp, oldest.id)
+        elif request.query_params.get(paginator.before_query_param):
+            position = decode_cursor(request.query_params[paginator.before_query_param])
+        else:
+            position = None
+
+        archived, has_more = read_archived_messages(
+            self.kwargs['room_id'],
+            before=position,
+            limit=paginator.page_size - len(paginator.page)
+        )
+        response.data['results'].extend(ArchivedMessageSerializer(archived, many=True).data)
+
+        if has_more:
+            oldest = archived[-1] if archived else {'timestamp': position[0], 'id': position[1]}
+            response.data['before'] = encode_cursor(oldest['timestamp'], oldest['id'])
+        elif archived:
+            response.data['before'] = None
+        return response
+
+
+class ChatAttachmentCreateView(generics.GenericAPIView):
+    """
+    Registers an attachment for a chat room and returns a presigned POST so
+    the client can upload the file directly to storage. The returned `id` is
+    what chat messages reference as `attachment_id`.
+    """
+    serializer_class = ChatAttachmentCreateSerializer
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, room_id):
+        chat_room = get_object_or_404(ChatRoom, id=room_id)
+        if request.user.id not in (chat_room.student_id, chat_room.mentor_id):
+            self.permission_denied(
+                request,
+                message="You are not authorized to upload files to this chat room."
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        attachment = ChatAttachment(
+            chat_room=chat_room,
+            uploader=request.user,
+            **serializer.validated_data
+        )
+        attachment.file.name = build_attachment_name(attachment.file_name)
+        attachment.save()
+
+        return Response(
+            {
+                'id': str(attachment.id),
+                'upload': generate_presigned_upload(attachment),
+                'expires_in': settings.CHAT_ATTACHMENT_UPLOAD_EXPIRY,
+            },
+            status=status.HTTP_201_CREATED
+        )
+
+
+class ChatAttachmentCompleteView(generics.GenericAPIView):
+    """
+    Confirms that a presigned upload finished, making the attachment
+    available to be sent in a chat message.
+    """
+    serializer_class = ChatAttachmentSerializer
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, attachment_id):
+        attachment = get_object_or_404(ChatAttachment, id=attachment_id, uploader=request.user)
+
+        if attachment.status == 'pending':
+            if not verify_uploaded(attachment):
+                return Response(
+                    {'detail': 'Upload not found or size does not match.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            attachment.status = 'uploaded'
+            attachment.save(update_fields=['status'])
+
+        return Response(self.get_serializer(attachment).data, status=status.HTTP_200_OK)
+
+
+class ChatRoomMarkReadView(generics.GenericAPIView):
+    """
+    Marks every message in a chat room up to `up_to` as read for the
+    requesting user and notifies the room so the sender sees the receipt.
+    """
+    serializer_class = MarkReadSerializer
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, room_id):
+        chat_room = get_object_or_404(ChatRoom, id=room_id)
+        if request.user.id not in (chat_room.student_id, chat_room.mentor_id):
+            self.permission_denied(
+                request,
+                message="You are not authorized to update messages in this chat room."
+            )
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        up_to = serializer.validated_data['up_to']
+
+        marked, still_unread = mark_room_read(chat_room.id, request.user.id, up_to)
+
+        if marked:
+            async_to_sync(get_channel_layer().group_send)(
+                f"chat_{chat_room.id}",
+                {
+                    'type': 'read_receipt',
+                    'frame': encode_frame({
+                        'type': 'read_receipt',
+                        'reader_id': request.user.id,
+                        'up_to': up_to,
+                        'chat_room_id': str(chat_room.id),
+                    }),
+                }
+            )
+
+        return Response({'marked': marked, 'unread': still_unread}, status=status.HTTP_200_OK)
+
+
+class ChatUnreadCountsView(generics.GenericAPIView):
+    """
+    Returns the unread message count of every chat room the user has unread
+    messages in, straight from the Redis counters.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread': get_unread_counts(request.user.id)}, status=status.HTTP_200_OK)
+
+
+class ChatInboxView(generics.ListAPIView):
+    """
+    Lists every chat room the user participates in, most recently active
+    first, with the other participant, a preview of the latest message and
+    the unread count. Rooms come from one query over the denormalized
+    last_message_* columns; unread counts come from one Redis read.
+    """
+    serializer_class = ChatInboxSerializer
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        user = self.request.user
+        return (
+            ChatRoom.objects
+            .filter(Q(student=user) | Q(mentor=user))
+            .select_related('student__student_profile', 'mentor__mentor_profile')
+            .order_by('-updated_at')
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['unread_counts'] = get_unread_counts(self.request.user.id)
+        return context
+
+
+class ChatMessageSearchView(generics.ListAPIView):
+    """
+    Full-text search over the messages of every chat room the user belongs
+    to (optionally a single `room`), ranked by relevance with highlighted
+    snippets. Matching uses the GIN-indexed `search_vector` column.
+    """
+    serializer_class = MessageSearchResultSerializer
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageSearchPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        terms = self.request.query_params.get('q', '').strip()
+        if not terms:
+            raise ValidationError({'q': 'A search query is required.'})
+
+        rooms = ChatRoom.objects.filter(Q(student=user) | Q(mentor=user))
+        room_id = self.request.query_params.get('room')
+        if room_id:
+            if not room_id.isdigit():
+                raise ValidationError({'room': 'Must be a chat room id.'})
+            rooms = rooms.filter(id=room_id)
+
+        query = SearchQuery(terms, config='english', search_type='websearch')
+        return (
+            Message.objects
+            .filter(chat_room__in=rooms.values('id'), search_vector=query)
+            .select_related('sender')
+            .annotate(
+                # ts_rank returns a real; widen it so cursor values round-trip exactly.
+                rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+                headline=SearchHeadline(
+                    'content',
+                    query,
+                    config='english',
+                    start_sel='<mark>',
+                    stop_sel='</mark>',
+                ),
+            )
+        )
+
+
+class ChatRoomExportView(generics.GenericAPIView):
+    """
+    Streams the whole transcript of a chat room, archived months included,
+    oldest first, as NDJSON (default) or CSV (`?output=csv`), with attachment
+    URLs. Rows are read and written in chunks as the response is sent, so
+    memory use is constant regardless of room size. Available to the room's
+    participants and to staff.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter('output', str, description="Export format: ndjson (default) or csv."),
+        ],
+        responses={200: None},
+    )
+    def get(self, request, room_id):
+        chat_room = get_object_or_404(ChatRoom, id=room_id)
+        if not request.user.is_staff and request.user.id not in (chat_room.student_id, chat_room.mentor_id):
+            self.permission_denied(
+                request,
+                message="You are not authorized to export this chat room."
+            )
+
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': f"Choose one of: {', '.join(EXPORT_FORMATS)}."})
+
+        content_type, stream = EXPORT_FORMATS[output]
+        # An async iterator, so daphne streams it instead of buffering it.
+        response = StreamingHttpResponse(stream(transcript_rows(chat_room.id)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="chat-{chat_room.id}.{output}"'
+        return response
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+from chat_app.models import Message
+from chat_app.utils import touch_room
+from config.frames import encode_frame
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriteBuffer:
+    """
+    Per-process write-behind buffer for chat messages.
+
+    Consumers broadcast a message as soon as it is received and hand the
+    unsaved Message to this buffer. Every `flush_interval` seconds (or when
+    `max_batch` messages are waiting) the buffer persists everything with one
+    `bulk_create` and one `updated_at` UPDATE per room, then acknowledges each
+    message back to the channel that sent it and tells every room which ids
+    its messages got, keyed by (sender_id, client_id) as broadcast.
+    """
+
+    def __init__(self, flush_interval, max_batch):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending = []
+        self._lock = asyncio.Lock()
+        self._flusher = None
+
+    def add(self, message, reply_channel=None, client_id=None):
+        self._pending.append((message, reply_channel, client_id))
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+        elif len(self._pending) >= self.max_batch:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    async def _run(self):
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+
+            persisted = await database_sync_to_async(self._persist)([item[0] for item in batch])
+            persisted_ids = {id(message) for message in persisted}
+
+        channel_layer = get_channel_layer()
+        assigned = {}
+        for message, reply_channel, client_id in batch:
+            persisted = id(message) in persisted_ids
+            assigned.setdefault(message.chat_room_id, []).append({
+                'sender_id': message.sender_id,
+                'client_id': client_id,
+                'message_id': message.id if persisted else None,
+                'timestamp': message.timestamp.isoformat(),
+                'persisted': persisted,
+            })
+            if not reply_channel:
+                continue
+            await channel_layer.send(reply_channel, {
+                'type': 'chat_ack',
+                'client_id': client_id,
+                'message_id': message.id,
+                'timestamp': message.timestamp.isoformat(),
+                'persisted': persisted,
+            })
+
+        # The room saw these messages before they had ids; without this the
+        # recipient could not mark_read, ack or resume from them.
+        for room_id, messages in assigned.items():
+            await channel_layer.group_send(f"chat_{room_id}", {
+                'type': 'message_ids',
+                'frame': encode_frame({
+                    'type': 'message_ids',
+                    'chat_room_id': str(room_id),
+                    'messages': messages,
+                }),
+            })
+
+    @staticmethod
+    def _persist(messages):
+        """
+        Writes a batch and returns the messages that made it to the database.
+        If the bulk insert fails, falls back to row-by-row saves so a single
+        bad message (e.g. a room deleted mid-flush) cannot sink the batch.
+        """
+        try:
+            with transaction.atomic():
+                Message.objects.bulk_create(messages)
+                saved = messages
+                _touch_rooms(saved)
+            return saved
+        except Exception as e:
+            logger.error(f"Bulk flush of {len(messages)} chat messages failed, retrying individually: {e}")
+
+        saved = []
+        for message in messages:
+            try:
+                message.pk = None
+                message.save(force_insert=True)
+                saved.append(message)
+            except Exception as e:
+                logger.error(f"Dropping chat message for room {message.chat_room_id}: {e}")
+        _touch_rooms(saved)
+        return saved
+
+
+def _touch_rooms(messages):
+    latest = {}
+    for message in messages:
+        current = latest.get(message.chat_room_id)
+        if current is None or message.timestamp > current.timestamp:
+            latest[message.chat_room_id] = message
+
+    for message in latest.values():
+        touch_room(message)
+
+
+message_buffer = MessageWriteBuffer(
+    flush_interval=settings.CHAT_WRITE_BEHIND_FLUSH_INTERVAL,
+    max_batch=settings.CHAT_WRITE_BEHIND_MAX_BATCH,
+)
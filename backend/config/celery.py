@@ -17,4 +17,18 @@ app.conf.beat_schedule = {
         'task': 'users.tasks.flush_expired_tokens',
         'schedule': timedelta(days=1),
     },
+    'maintain-message-partitions-daily': {
+        'task': 'chat_app.tasks.maintain_message_partitions',
+        'schedule': timedelta(days=1),
+    },
+    'relay-notification-outbox': {
+        'task': 'notifications.tasks.relay_notification_outbox',
+        'schedule': timedelta(seconds=2),
+        # A run that could not start in time is superseded by the next one.
+        'options': {'expires': 2},
+    },
+    'prune-notifications-daily': {
+        'task': 'notifications.tasks.prune_old_notifications',
+        'schedule': timedelta(days=1),
+    },
 }
@@ -0,0 +1,99 @@
+import json
+import logging
+
+import msgpack
+from channels.consumer import get_handler_name
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Clients that offer this subprotocol get binary MessagePack frames; everyone
+# else keeps JSON text frames.
+MSGPACK_SUBPROTOCOL = 'edconnect.msgpack'
+
+# Close code for clients that stop acknowledging the frames sent to them.
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+# Client frames that opt a connection into the slow-consumer bound.
+ACK_FRAME_TYPES = ('heartbeat', 'delivered', 'seen')
+
+
+def encode_frame(payload):
+    """
+    Serializes an outgoing frame once as JSON, the default wire format. Put
+    the result in a group event so JSON recipients send it as is instead of
+    re-serializing the event. MessagePack recipients convert it on their own
+    side, so the event carries a single blob through the channel layer.
+    """
+    return {'text': json.dumps(payload)}
+
+
+class FrameProtocolMixin:
+    """
+    Wire format handling shared by the WebSocket consumers. Mix into an
+    AsyncWebsocketConsumer and implement `receive_content(content)`.
+
+    The server's transport buffers outgoing frames without bound, so a send
+    never tells us whether the client is keeping up. Clients opt into a
+    bound by sending any of ACK_FRAME_TYPES: from then on, every frame sent
+    counts against the client until it sends anything back, and a client
+    that lets WEBSOCKET_OUTBOUND_QUEUE_SIZE frames go unanswered is
+    disconnected with SLOW_CONSUMER_CLOSE_CODE. Clients that never
+    heartbeat or ack are not bounded.
+    """
+
+    use_msgpack = False
+    # Group events whose handlers only relay an `encode_frame` result.
+    relay_events = ()
+    # None until the client opts in with a heartbeat or ack.
+    _unacked = None
+    _dropped = False
+
+    async def accept_frames(self):
+        self.use_msgpack = MSGPACK_SUBPROTOCOL in self.scope.get('subprotocols', [])
+        await self.accept(subprotocol=MSGPACK_SUBPROTOCOL if self.use_msgpack else None)
+
+    async def _send_frame(self, **message):
+        if self._dropped:
+            return
+
+        if self._unacked is not None:
+            self._unacked += 1
+            if self._unacked > settings.WEBSOCKET_OUTBOUND_QUEUE_SIZE:
+                self._dropped = True
+                logger.warning(f"Closing slow WebSocket {self.channel_name}: {self._unacked - 1} frames unanswered")
+                await self.close(code=SLOW_CONSUMER_CLOSE_CODE)
+                return
+        await self.send(**message)
+
+    async def dispatch(self, message):
+        # Channels closes stale DB connections on the shared sync thread before
+        # every handler. Relaying a pre-encoded frame never touches the
+        # database, so fan-out skips that hop.
+        if message['type'] in self.relay_events:
+            await getattr(self, get_handler_name(message))(message)
+            return
+        await super().dispatch(message)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        if bytes_data is not None:
+            content = msgpack.unpackb(bytes_data)
+        else:
+            content = json.loads(text_data)
+        if self._unacked is not None or content.get('type') in ACK_FRAME_TYPES:
+            self._unacked = 0
+        await self.receive_content(content)
+
+    async def send_content(self, payload):
+        """Sends a frame meant for this connection only."""
+        if self.use_msgpack:
+            await self._send_frame(bytes_data=msgpack.packb(payload))
+        else:
+            await self._send_frame(text_data=json.dumps(payload))
+
+    async def send_encoded(self, frame):
+        """Sends a frame already serialized by `encode_frame`."""
+        if self.use_msgpack:
+            await self._send_frame(bytes_data=msgpack.packb(json.loads(frame['text'])))
+        else:
+            await self._send_frame(text_data=frame['text'])
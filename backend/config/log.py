@@ -0,0 +1,86 @@
+import atexit
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueueStreamHandler(QueueHandler):
+    """
+    Hands records to a background thread that formats and writes them to a
+    stream, so logging from the event loop costs a queue put and never waits
+    on stdout. When the queue is full, records are dropped and counted
+    instead of blocking the caller.
+    """
+
+    def __init__(self, stream=None, maxsize=10000):
+        self.target = logging.StreamHandler(stream or sys.stdout)
+        self.maxsize = maxsize
+        self.dropped = 0
+        super().__init__(queue.Queue(maxsize))
+        self._start()
+        atexit.register(self.close)
+        # Forked workers (gunicorn, Celery prefork) do not inherit the thread.
+        os.register_at_fork(after_in_child=self._restart)
+
+    def _start(self):
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+
+    def _restart(self):
+        self.queue = queue.Queue(self.maxsize)
+        self._start()
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread.
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # The queue never leaves the process, so skip QueueHandler's eager
+        # formatting and pass the record through untouched.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through a `rate` fraction of records below WARNING. Attach it to
+    chatty loggers; warnings and errors are never sampled away.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class TruncatingFormatter(logging.Formatter):
+    """
+    Cuts messages down to `max_length` characters, so a stray payload in a
+    log call cannot turn into megabytes of output.
+    """
+
+    def __init__(self, *args, max_length=2000, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_length = max_length
+
+    def formatMessage(self, record):
+        if len(record.message) > self.max_length:
+            extra = len(record.message) - self.max_length
+            record.message = f"{record.message[:self.max_length]}... [{extra} more characters]"
+        return super().formatMessage(record)
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.postgres',
     # Third-party apps
     'rest_framework',
     'rest_framework_simplejwt',
@@ -143,9 +144,82 @@ CHANNEL_LAYERS = {
     },
 }
 
-import logging
-
-logging.getLogger('channels_redis').setLevel(logging.WARNING)
+# Optional write-behind persistence for chat messages: messages are broadcast
+# immediately and bulk-inserted by a per-process buffer every flush interval.
+CHAT_WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND") == "True"
+CHAT_WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("CHAT_WRITE_BEHIND_FLUSH_INTERVAL", 1.0))
+CHAT_WRITE_BEHIND_MAX_BATCH = int(os.getenv("CHAT_WRITE_BEHIND_MAX_BATCH", 500))
+
+# Chat frames (messages, mark_read) are rate limited with Redis token buckets
+# per sender and per room: RATE tokens per second, up to BURST at once.
+CHAT_USER_MESSAGE_RATE = float(os.getenv("CHAT_USER_MESSAGE_RATE", 2))
+CHAT_USER_MESSAGE_BURST = int(os.getenv("CHAT_USER_MESSAGE_BURST", 10))
+CHAT_ROOM_MESSAGE_RATE = float(os.getenv("CHAT_ROOM_MESSAGE_RATE", 5))
+CHAT_ROOM_MESSAGE_BURST = int(os.getenv("CHAT_ROOM_MESSAGE_BURST", 20))
+
+# Frames sent to one WebSocket since the client last sent anything, enforced
+# once it has sent a heartbeat or delivered/seen ack. A client that falls this
+# far behind is disconnected instead of having frames buffered without bound.
+WEBSOCKET_OUTBOUND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_OUTBOUND_QUEUE_SIZE", 256))
+
+# Ephemeral chat signals (typing, delivered, seen): per-connection rate limit
+# and server-side coalescing. These never touch the database.
+CHAT_EPHEMERAL_RATE = 5
+CHAT_EPHEMERAL_BURST = 10
+CHAT_TYPING_REFRESH_SECONDS = 3
+CHAT_RECEIPT_COALESCE_SECONDS = 0.5
+
+# Messages replayed in one frame to a client reconnecting with last_seen_id.
+# Larger gaps are left to the paginated history endpoint.
+CHAT_REPLAY_LIMIT = 200
+
+# chat_app_message is partitioned by month. Partitions are created this many
+# months ahead, and partitions older than CHAT_MESSAGE_HOT_MONTHS are exported
+# to compressed JSONL in storage and detached.
+CHAT_MESSAGE_PARTITIONS_AHEAD = 3
+CHAT_MESSAGE_HOT_MONTHS = int(os.getenv("CHAT_MESSAGE_HOT_MONTHS", 12))
+
+# All logging goes through one queue; a background thread formats records and
+# writes them to stdout, so the event loop never blocks on log I/O. Per-message
+# consumer logs are sampled and every message is truncated.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_MAX_MESSAGE_LENGTH = int(os.getenv("LOG_MAX_MESSAGE_LENGTH", 2000))
+LOG_HOT_PATH_SAMPLE_RATE = float(os.getenv("LOG_HOT_PATH_SAMPLE_RATE", 0.01))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'hot_path_sample': {
+            '()': 'config.log.SamplingFilter',
+            'rate': LOG_HOT_PATH_SAMPLE_RATE,
+        },
+    },
+    'formatters': {
+        'default': {
+            '()': 'config.log.TruncatingFormatter',
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+            'max_length': LOG_MAX_MESSAGE_LENGTH,
+        },
+    },
+    'handlers': {
+        'queue': {
+            # A factory, not 'class': from Python 3.12 dictConfig rebuilds any
+            # QueueHandler subclass given as 'class' around its own queue.
+            '()': 'config.log.QueueStreamHandler',
+            'formatter': 'default',
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django': {'handlers': ['queue'], 'level': LOG_LEVEL, 'propagate': False},
+        'channels_redis': {'level': 'WARNING'},
+        'chat_app.consumers': {'filters': ['hot_path_sample']},
+    },
+}
 
 
 
@@ -284,6 +358,13 @@ AWS_S3_FILE_OVERWRITE = False
 AWS_DEFAULT_ACL = None
 AWS_S3_VERIFY = os.getenv("AWS_S3_VERIFY", "True") == "True"
 
+# Chat attachments are uploaded straight to the bucket with a presigned POST.
+CHAT_ATTACHMENT_MAX_SIZE = int(os.getenv("CHAT_ATTACHMENT_MAX_SIZE", 25 * 1024 * 1024))
+CHAT_ATTACHMENT_UPLOAD_EXPIRY = int(os.getenv("CHAT_ATTACHMENT_UPLOAD_EXPIRY", 3600))
+# Image attachments get a WebP thumbnail that fits in this box.
+CHAT_THUMBNAIL_SIZE = (320, 320)
+CHAT_THUMBNAIL_QUALITY = 75
+
 
 # Storage settings for Django 4.2+
 STORAGES = {
@@ -346,6 +427,40 @@ CACHES = {
 
 REDIS_USER_TTL = 600
 
+# message_received notifications are coalesced per (recipient, room) over
+# this window into a single "N new messages from X" notification.
+MESSAGE_NOTIFICATION_DEBOUNCE_SECONDS = 10
+
+# Seconds a Celery task waits for the worker's channel publisher to deliver.
+CHANNEL_PUBLISH_TIMEOUT = 10
+
+# Recipients handled per INSERT and per round of group sends in bulk fan-out.
+BULK_NOTIFICATION_BATCH_SIZE = 1000
+
+# Notifications queued by views in NotificationOutbox are delivered by a beat
+# task every couple of seconds, this many rows per transaction.
+NOTIFICATION_OUTBOX_BATCH_SIZE = 500
+
+# Lifetime of a user's cached unread notification counters; bounds any drift
+# from the database before they are rebuilt.
+NOTIFICATION_UNREAD_CACHE_TTL = 60 * 60 * 24
+
+# Notifications are pruned daily: read ones after NOTIFICATION_READ_RETENTION_DAYS,
+# unread ones after NOTIFICATION_UNREAD_RETENTION_DAYS, deleting at most
+# NOTIFICATION_PRUNE_BATCH_SIZE ids per statement.
+NOTIFICATION_READ_RETENTION_DAYS = int(os.getenv("NOTIFICATION_READ_RETENTION_DAYS", 30))
+NOTIFICATION_UNREAD_RETENTION_DAYS = int(os.getenv("NOTIFICATION_UNREAD_RETENTION_DAYS", 180))
+NOTIFICATION_PRUNE_BATCH_SIZE = 5000
+
+# WebSocket presence: connections must heartbeat within this many seconds.
+PRESENCE_TTL_SECONDS = 60
+
+# Chat room participants used to authorize WebSocket connects. Entries live in
+# a per-process LRU (short TTL) in front of the Redis cache.
+CHAT_PARTICIPANT_CACHE_SIZE = 10000
+CHAT_PARTICIPANT_LOCAL_TTL = 60
+CHAT_PARTICIPANT_CACHE_TTL = 24 * 3600
+
 
 # Stripe Configuration
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', 'sk_test_fallback_secret_key')
@@ -1,5 +1,6 @@
 from asgiref.sync import sync_to_async
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics, permissions, status
@@ -11,7 +12,7 @@ from rest_framework.views import APIView
 from auth.authentication import CookieJWTAuthentication
 from chat_app.models import ChatRoom
 from connections.models import Connection
-from notifications.tasks import send_realtime_notification_task
+from notifications.outbox import enqueue_notification
 from users.models import User
 
 from .serializers import (ConnectionRequestSerializer, ConnectionSerializer,
@@ -39,27 +40,28 @@ class RequestConnectionView(APIView):
         student = request.user
         mentor = serializer.validated_data['mentor']
 
-        connection, created = Connection.objects.get_or_create(
-            student=student,
-            mentor=mentor,
-            defaults={"status": "pending"}
-        )
+        with transaction.atomic():
+            connection, created = Connection.objects.get_or_create(
+                student=student,
+                mentor=mentor,
+                defaults={"status": "pending"}
+            )
 
-        if not created:
-            if connection.status == "accepted":
-                raise ValidationError("You are already connected with this mentor.")
-            else:
-                connection.status = "pending"
-                connection.save(update_fields=["status", "updated_at"])
-
-        send_realtime_notification_task.delay(
-            recipient_id=mentor.id,
-            sender_id=student.id,
-            notification_type='connection_request_received',
-            message=f"{student.username} has sent you a connection request.",
-            related_object_id=connection.id,
-            related_object_type='Connection'
-        )
+            if not created:
+                if connection.status == "accepted":
+                    raise ValidationError("You are already connected with this mentor.")
+                else:
+                    connection.status = "pending"
+                    connection.save(update_fields=["status", "updated_at"])
+
+            enqueue_notification(
+                recipient_id=mentor.id,
+                sender_id=student.id,
+                notification_type='connection_request_received',
+                message=f"{student.username} has sent you a connection request.",
+                related_object_id=connection.id,
+                related_object_type='Connection'
+            )
 
         return Response(ConnectionSerializer(connection).data, status=status.HTTP_201_CREATED)
 class PendingRequestsView(generics.ListAPIView):
@@ -90,17 +92,18 @@ class ManageConnectionStatus(APIView):
         serializer.is_valid(raise_exception=True)
 
         old_status = connection.status
-        connection = serializer.save()
-
-        if connection.status == 'accepted' and old_status != 'accepted':
-            send_realtime_notification_task.delay(
-                recipient_id=connection.student.id,
-                sender_id=user.id,
-                notification_type='connection_request_accepted',
-                message=f"{user.username} has accepted your connection request!.",
-                related_object_id=connection.id,
-                related_object_type='Connection'
-            )
+        with transaction.atomic():
+            connection = serializer.save()
+
+            if connection.status == 'accepted' and old_status != 'accepted':
+                enqueue_notification(
+                    recipient_id=connection.student_id,
+                    sender_id=user.id,
+                    notification_type='connection_request_accepted',
+                    message=f"{user.username} has accepted your connection request!.",
+                    related_object_id=connection.id,
+                    related_object_type='Connection'
+                )
 
         return Response(ConnectionSerializer(connection).data, status=status.HTTP_200_OK)
 
@@ -133,16 +136,18 @@ class CancelConnectionView(APIView):
         if connection.status != 'pending':
             return Response({'detail': 'Only pending requests can be cancelled.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        connection.delete()
+        connection_id = connection.id
+        with transaction.atomic():
+            connection.delete()
 
-        send_realtime_notification_task.delay(
-            recipient_id=connection.mentor.id,
-            sender_id=request.user.id,
-            notification_type='connection_request_cancelled',
-            message=f"{request.user.username} cancelled their connection request.",
-            related_object_id=connection.id,
-            related_object_type='Connection'
-        )
+            enqueue_notification(
+                recipient_id=connection.mentor_id,
+                sender_id=request.user.id,
+                notification_type='connection_request_cancelled',
+                message=f"{request.user.username} cancelled their connection request.",
+                related_object_id=connection_id,
+                related_object_type='Connection'
+            )
 
         return Response({'detail': 'Connection request cancelled successfully.'}, status=status.HTTP_204_NO_CONTENT)
 
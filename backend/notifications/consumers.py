@@ -1,17 +1,21 @@
-import json
-
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.layers import get_channel_layer
 from django.contrib.auth import get_user_model
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from config.frames import FrameProtocolMixin
+
 from .models import Notification
+from .presence import NOTIFICATIONS_SCOPE, mark_absent, mark_present
 from .serializers import NotificationSerializer
 
 User = get_user_model()
 
-class NotificationConsumer(AsyncWebsocketConsumer):
+class NotificationConsumer(FrameProtocolMixin, AsyncWebsocketConsumer):
+    relay_events = ('send_notification', 'notifications_read', 'notifications_dismissed')
+
     async def connect(self):
         self.user = self.scope["user"] 
         if self.user.is_authenticated:
@@ -21,7 +25,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 self.notification_group_name,
                 self.channel_name
             )
-            await self.accept()
+            await self.accept_frames()
+            await sync_to_async(mark_present, thread_sensitive=False)(
+                self.user.id, NOTIFICATIONS_SCOPE, self.channel_name
+            )
         else:
             await self.close()
 
@@ -31,16 +38,21 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 self.notification_group_name,
                 self.channel_name
             )
+            await sync_to_async(mark_absent, thread_sensitive=False)(
+                self.user.id, NOTIFICATIONS_SCOPE, self.channel_name
+            )
 
-    async def receive(self, text_data):
-        #For Futre enhancement
-        pass
+    async def receive_content(self, content):
+        if content.get('type') == 'heartbeat':
+            await sync_to_async(mark_present, thread_sensitive=False)(
+                self.user.id, NOTIFICATIONS_SCOPE, self.channel_name
+            )
 
     async def send_notification(self, event):
-        notification_data = event['notification_data']
+        await self.send_encoded(event['frame'])
 
-        await self.send(text_data=json.dumps({
-            'type': 'notification', 
-            'notification': notification_data
-        }))
+    async def notifications_read(self, event):
+        await self.send_encoded(event['frame'])
 
+    async def notifications_dismissed(self, event):
+        await self.send_encoded(event['frame'])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from notifications.models import Notification
+from notifications.serializers import build_notification_payload
+
+
+class Command(BaseCommand):
+    help = (
+        "Stores the rendered payload on notifications created before payloads "
+        "were stored, in primary-key order. Safe to rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Notifications updated per query.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = Notification.objects.filter(payload__isnull=True).select_related('sender').order_by('id')
+
+        filled = 0
+        last_id = 0
+        while True:
+            batch = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            for notification in batch:
+                notification.payload = build_notification_payload(notification)
+            Notification.objects.bulk_update(batch, ['payload'])
+            filled += len(batch)
+            last_id = batch[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"Stored payloads for {filled} notifications"))
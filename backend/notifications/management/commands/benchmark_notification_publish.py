@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from channels.layers import get_channel_layer
+from django.core.management.base import BaseCommand
+
+from config.frames import encode_frame
+from notifications.publisher import ChannelPublisher
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the cost of pushing notifications from sync code with a "
+        "fresh event loop per send (asyncio.run) against the worker-scoped "
+        "ChannelPublisher. Sends to groups nobody listens on; the channel "
+        "layer's Redis must be reachable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help="Notifications sent per strategy.")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        event = {
+            'type': 'send_notification',
+            'frame': encode_frame({'type': 'notification', 'notification': {'message': "benchmark"}}),
+        }
+        groups = [f"benchmark_notifications_{index}" for index in range(count)]
+
+        def asyncio_run():
+            for group in groups:
+                asyncio.run(get_channel_layer().group_send(group, event))
+
+        publisher = ChannelPublisher()
+
+        def persistent_loop():
+            for group in groups:
+                publisher.publish(group, event)
+
+        for label, strategy in (('asyncio.run per send', asyncio_run), ('ChannelPublisher', persistent_loop)):
+            start = time.perf_counter()
+            strategy()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{label}: {count} sends in {elapsed:.2f}s, "
+                f"{elapsed / count * 1000:.2f} ms/send, {count / elapsed:.0f} sends/sec"
+            )
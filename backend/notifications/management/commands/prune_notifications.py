@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.retention import prune_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes read notifications older than NOTIFICATION_READ_RETENTION_DAYS "
+        "and unread ones older than NOTIFICATION_UNREAD_RETENTION_DAYS, in "
+        "primary-key batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--read-days', type=int, default=settings.NOTIFICATION_READ_RETENTION_DAYS,
+            help="Age in days after which read notifications are deleted."
+        )
+        parser.add_argument(
+            '--unread-days', type=int, default=settings.NOTIFICATION_UNREAD_RETENTION_DAYS,
+            help="Age in days after which unread notifications are deleted."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.NOTIFICATION_PRUNE_BATCH_SIZE,
+            help="Primary-key range covered by each DELETE."
+        )
+
+    def handle(self, *args, **options):
+        reclaimed = prune_notifications(options['read_days'], options['unread_days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {reclaimed['read']} read and {reclaimed['unread']} unread notifications"
+        ))
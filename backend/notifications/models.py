@@ -26,9 +26,35 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Serialized form rendered once at creation, without the fields that
+    # change or are only known after the INSERT (see serializers.LIVE_FIELDS).
+    payload = models.JSONField(null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ['-created_at'] 
+        indexes = [
+            # Backs a recipient's unread feed (newest first) and unread counts.
+            models.Index(fields=['recipient', 'is_read', 'created_at'], name='notif_recipient_read_idx'),
+        ]
 
     def __str__(self):
         sender_info = f" from {self.sender.username}" if self.sender else ""
-        return f"Notification for {self.recipient.username}: {self.notification_type}{sender_info} ({'Read' if self.is_read else 'Unread'})"
\ No newline at end of file
+        return f"Notification for {self.recipient.username}: {self.notification_type}{sender_info} ({'Read' if self.is_read else 'Unread'})"
+
+
+class NotificationOutbox(models.Model):
+    """
+    A notification waiting to be delivered. Views write it in the same
+    transaction as the change it reports; the outbox relay turns committed
+    entries into Notifications and pushes them.
+    """
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    notification_type = models.CharField(max_length=50, choices=Notification.NOTIFICATION_TYPES)
+    message = models.CharField(max_length=255)
+    related_object_id = models.PositiveIntegerField(null=True, blank=True)
+    related_object_type = models.CharField(max_length=100, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Outbox {self.notification_type} for user {self.recipient_id}"
@@ -0,0 +1,67 @@
+from functools import partial
+
+from django.db import transaction
+
+from .models import Notification, NotificationOutbox
+from .serializers import build_notification_payload
+from .tasks import push_notifications
+
+
+def enqueue_notification(recipient_id, sender_id, notification_type, message, related_object_id=None, related_object_type=None):
+    """
+    Records a notification in the outbox. Call it inside the transaction
+    that makes the change it reports: it is delivered only if that commits,
+    and no broker call is made during the request.
+    """
+    return NotificationOutbox.objects.create(
+        recipient_id=recipient_id,
+        sender_id=sender_id,
+        notification_type=notification_type,
+        message=message,
+        related_object_id=related_object_id,
+        related_object_type=related_object_type
+    )
+
+
+def relay_outbox(batch_size):
+    """
+    Drains committed outbox entries, `batch_size` at a time. Each batch
+    becomes Notifications with one INSERT and leaves the outbox with one
+    DELETE in the same transaction, so every entry is delivered exactly
+    once; the push follows the commit. Locked rows are skipped, so
+    overlapping relays split the work. Returns the number relayed.
+    """
+    relayed = 0
+    while True:
+        with transaction.atomic():
+            entries = list(
+                NotificationOutbox.objects
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('sender')
+                .order_by('id')[:batch_size]
+            )
+            if not entries:
+                break
+
+            notifications = [
+                Notification(
+                    recipient_id=entry.recipient_id,
+                    sender=entry.sender,
+                    notification_type=entry.notification_type,
+                    message=entry.message,
+                    related_object_id=entry.related_object_id,
+                    related_object_type=entry.related_object_type
+                )
+                for entry in entries
+            ]
+            for notification in notifications:
+                notification.payload = build_notification_payload(notification)
+            Notification.objects.bulk_create(notifications)
+            NotificationOutbox.objects.filter(id__in=[entry.id for entry in entries]).delete()
+
+            transaction.on_commit(partial(push_notifications, notifications))
+
+        relayed += len(entries)
+        if len(entries) < batch_size:
+            break
+    return relayed
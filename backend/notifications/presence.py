@@ -0,0 +1,68 @@
+import time
+
+from django.conf import settings
+
+from .redis_utils import get_redis
+
+NOTIFICATIONS_SCOPE = 'notifications'
+
+
+def presence_key(user_id):
+    return f"presence:{user_id}"
+
+
+def chat_scope(room_id):
+    return f"chat:{room_id}"
+
+
+def mark_present(user_id, scope, channel_name):
+    """
+    Records (or refreshes, on heartbeat) one live connection of a user.
+    Each connection is a member of the user's sorted set scored by the time
+    it expires, so crashed connections disappear without a disconnect.
+    """
+    now = time.time()
+    ttl = settings.PRESENCE_TTL_SECONDS
+    key = presence_key(user_id)
+
+    pipe = get_redis().pipeline()
+    pipe.zremrangebyscore(key, '-inf', now)
+    pipe.zadd(key, {f"{scope}|{channel_name}": now + ttl})
+    pipe.expire(key, ttl)
+    pipe.execute()
+
+
+def mark_absent(user_id, scope, channel_name):
+    get_redis().zrem(presence_key(user_id), f"{scope}|{channel_name}")
+
+
+def _live_scopes(members):
+    return {member.decode().split('|', 1)[0] for member in members}
+
+
+def is_in_room(user_id, room_id):
+    """True if the user has a live WebSocket open on the given chat room."""
+    members = get_redis().zrangebyscore(presence_key(user_id), time.time(), '+inf')
+    return chat_scope(room_id) in _live_scopes(members)
+
+
+def get_presence(user_ids):
+    """
+    Returns {user_id: {'online': bool, 'rooms': [room ids with a live chat
+    connection]}} for several users in one round trip.
+    """
+    now = time.time()
+    pipe = get_redis().pipeline()
+    for user_id in user_ids:
+        pipe.zrangebyscore(presence_key(user_id), now, '+inf')
+
+    presence = {}
+    for user_id, members in zip(user_ids, pipe.execute()):
+        scopes = _live_scopes(members)
+        presence[user_id] = {
+            'online': bool(scopes),
+            'rooms': sorted(
+                int(scope.split(':', 1)[1]) for scope in scopes if scope.startswith('chat:')
+            ),
+        }
+    return presence
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import threading
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+
+class ChannelPublisher:
+    """
+    Worker-scoped channel layer publisher for sync code such as Celery tasks.
+
+    Keeps one event loop running on a daemon thread for the life of the
+    process. The channel layer caches its Redis connections per event loop,
+    so every publish reuses the same pool instead of building a new loop and
+    new connections the way `asyncio.run(group_send(...))` does. The loop is
+    recreated after a fork, since the thread does not survive it.
+
+    Call it from sync code only: it blocks until the publish is done.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+
+    def _get_loop(self):
+        if self._loop is not None and self._pid == os.getpid():
+            return self._loop
+
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='channel-publisher', daemon=True).start()
+                self._loop, self._pid = loop, os.getpid()
+        return self._loop
+
+    async def _group_send_all(self, events):
+        channel_layer = get_channel_layer()
+        await asyncio.gather(*(channel_layer.group_send(group, event) for group, event in events))
+
+    def publish_many(self, events):
+        """Sends every (group, event) pair, all from the publisher's loop."""
+        future = asyncio.run_coroutine_threadsafe(self._group_send_all(events), self._get_loop())
+        return future.result(timeout=settings.CHANNEL_PUBLISH_TIMEOUT)
+
+    def publish(self, group, payload):
+        """Sends one channel layer event (a dict with a 'type') to a group."""
+        self.publish_many([(group, payload)])
+
+
+publisher = ChannelPublisher()
+
+
+def publish(group, payload):
+    publisher.publish(group, payload)
+
+
+def publish_many(events):
+    publisher.publish_many(events)
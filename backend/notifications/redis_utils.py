@@ -0,0 +1,87 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+
+
+def get_redis():
+    return get_redis_connection("default")
+
+
+def message_debounce_key(recipient_id, room_id):
+    return f"notifications:debounce:{recipient_id}:{room_id}"
+
+
+def add_pending_message(recipient_id, room_id, ttl):
+    """
+    Counts one more unnotified message for (recipient, room). Returns True
+    for the first message of a window, i.e. when a flush must be scheduled.
+    """
+    key = message_debounce_key(recipient_id, room_id)
+    pipe = get_redis().pipeline()
+    pipe.incr(key)
+    # Safety net: lets a new window start even if the flush never runs. Set in
+    # the same MULTI as the first INCR, so the key can never outlive it.
+    pipe.expire(key, ttl, nx=True)
+    count, _ = pipe.execute()
+    return count == 1
+
+
+def pop_pending_messages(recipient_id, room_id):
+    """Returns and clears the number of unnotified messages for (recipient, room)."""
+    count = get_redis().getdel(message_debounce_key(recipient_id, room_id))
+    return int(count) if count else 0
+
+
+def unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+# Adjusts an unread counter only while it is cached, so a missing hash is
+# rebuilt from the database instead of starting from a partial count.
+# ARGV: notification type, amount.
+INCR_IF_CACHED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+end
+return nil
+"""
+
+_incr_if_cached = None
+
+
+def increment_unread_notifications(counts):
+    """
+    Applies {(user_id, notification_type): amount} to the cached unread
+    counters in one round trip. Users without a cached counter are skipped.
+    """
+    global _incr_if_cached
+    if not counts:
+        return
+    redis = get_redis()
+    if _incr_if_cached is None:
+        _incr_if_cached = redis.register_script(INCR_IF_CACHED_SCRIPT)
+
+    pipe = redis.pipeline(transaction=False)
+    for (user_id, notification_type), amount in counts.items():
+        _incr_if_cached(keys=[unread_key(user_id)], args=[notification_type, amount], client=pipe)
+    pipe.execute()
+
+
+def get_cached_unread_notifications(user_id):
+    """Returns {notification_type: unread_count}, or None if nothing is cached."""
+    counts = get_redis().hgetall(unread_key(user_id))
+    if not counts:
+        return None
+    return {notification_type.decode(): max(0, int(count)) for notification_type, count in counts.items()}
+
+
+def cache_unread_notifications(user_id, counts):
+    """Stores a full {notification_type: unread_count} map for a user."""
+    pipe = get_redis().pipeline()
+    pipe.hset(unread_key(user_id), mapping=counts)
+    pipe.expire(unread_key(user_id), settings.NOTIFICATION_UNREAD_CACHE_TTL)
+    pipe.execute()
+
+
+def clear_unread_notifications(user_ids):
+    """Drops cached unread counters so they are recounted on next read."""
+    get_redis().delete(*(unread_key(user_id) for user_id in user_ids))
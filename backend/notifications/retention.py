@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Notification
+from .redis_utils import clear_unread_notifications
+
+
+def prune_notifications(read_days, unread_days, batch_size):
+    """
+    Deletes read notifications older than `read_days` and unread ones older
+    than `unread_days`. Walks the table in primary-key windows of
+    `batch_size` ids from the oldest row, one short DELETE per window, and
+    stops at the first window holding notifications newer than both
+    cutoffs: ids grow with created_at, so nothing past it is old enough.
+    Returns {'read': deleted, 'unread': deleted}.
+    """
+    now = timezone.now()
+    read_cutoff = now - timedelta(days=read_days)
+    unread_cutoff = now - timedelta(days=unread_days)
+    newest_cutoff = max(read_cutoff, unread_cutoff)
+
+    reclaimed = {'read': 0, 'unread': 0}
+    start = Notification.objects.order_by('id').values_list('id', flat=True).first()
+    while start is not None:
+        window = Notification.objects.filter(id__gte=start, id__lt=start + batch_size)
+
+        reclaimed['read'] += window.filter(is_read=True, created_at__lt=read_cutoff).delete()[0]
+
+        expired = window.filter(is_read=False, created_at__lt=unread_cutoff)
+        recipient_ids = set(expired.values_list('recipient_id', flat=True))
+        if recipient_ids:
+            reclaimed['unread'] += expired.delete()[0]
+            # Their cached unread counts now include deleted rows.
+            clear_unread_notifications(recipient_ids)
+
+        if window.filter(created_at__gte=newest_cutoff).exists():
+            break
+        start = (
+            Notification.objects.filter(id__gte=start + batch_size)
+            .order_by('id').values_list('id', flat=True).first()
+        )
+
+    return reclaimed
@@ -35,4 +35,45 @@ class NotificationSerializer(serializers.ModelSerializer):
         """
         Returns the username of the sender, or a default if no sender.
         """
-        return obj.sender.username if obj.sender else "System" 
\ No newline at end of file
+        return obj.sender.username if obj.sender else "System"
+
+
+class NotificationSelectionSerializer(serializers.Serializer):
+    """
+    Selects the notifications a bulk read or dismiss applies to. Without
+    either field, all of the user's notifications.
+    """
+    up_to_id = serializers.IntegerField(min_value=1, required=False)
+    notification_type = serializers.ChoiceField(choices=Notification.NOTIFICATION_TYPES, required=False)
+
+
+# Merged into the stored payload on every read: is_read changes after
+# creation, id and created_at are only set by the INSERT.
+LIVE_FIELDS = ('id', 'is_read', 'created_at')
+
+_created_at = serializers.DateTimeField()
+
+
+def build_notification_payload(notification):
+    """
+    Renders an unsaved notification for Notification.payload. The sender,
+    if any, must already be loaded.
+    """
+    data = NotificationSerializer(notification).data
+    return {field: value for field, value in data.items() if field not in LIVE_FIELDS}
+
+
+def notification_data(notification):
+    """
+    The NotificationSerializer output for a saved notification, built from
+    its stored payload without running the serializer. Rows created before
+    payloads were stored are serialized in full.
+    """
+    if notification.payload is None:
+        return NotificationSerializer(notification).data
+    return {
+        **notification.payload,
+        'id': notification.id,
+        'is_read': notification.is_read,
+        'created_at': _created_at.to_representation(notification.created_at),
+    }
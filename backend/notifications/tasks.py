@@ -1,55 +1,258 @@
 # backend/notifications/tasks.py
-import asyncio
 import logging
+from collections import Counter
 
 from asgiref.sync import sync_to_async
 from celery import shared_task
-from channels.layers import get_channel_layer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from config.frames import encode_frame
+
 from .models import Notification
-from .serializers import NotificationSerializer
+from .presence import is_in_room
+from .publisher import publish, publish_many
+from .redis_utils import increment_unread_notifications, pop_pending_messages
+from .retention import prune_notifications
+from .serializers import build_notification_payload, notification_data
 
 User = get_user_model()
 
 
 logger = logging.getLogger(__name__)
 
-@shared_task(bind=True) # `bind=True` allows the task to access itself for retries etc.
-def send_realtime_notification_task(self, recipient_id, sender_id, notification_type, message, related_object_id=None, related_object_type=None):
+
+def create_and_send_notification(recipient_id, sender_id, notification_type, message, related_object_id=None, related_object_type=None):
     """
-    Celery task to create a Notification in the DB and send it via WebSocket.
+    Creates a Notification in the DB and pushes it to the recipient's
+    notification group.
+    """
+    recipient = User.objects.get(id=recipient_id)
+    sender = User.objects.get(id=sender_id) if sender_id else None
+
+    notification = Notification(
+        recipient=recipient,
+        sender=sender,
+        notification_type=notification_type,
+        message=message,
+        related_object_id=related_object_id,
+        related_object_type=related_object_type
+    )
+    notification.payload = build_notification_payload(notification)
+    notification.save()
+    count_unread({(recipient.id, notification_type): 1})
+
+    group_name = f"user_{recipient.id}_notifications"
+
+    publish(group_name, notification_event(notification_data(notification)))
+    return notification
+
+
+def count_unread(counts):
+    """
+    Adds new notifications to the cached unread counters. A failure is only
+    logged: the rows are already saved and the counters expire and are
+    rebuilt from the database.
+    """
+    try:
+        increment_unread_notifications(counts)
+    except Exception as e:
+        logger.error(f"Updating unread notification counters failed: {e}")
+
+
+def notification_event(notification_data):
+    return {
+        'type': 'send_notification',
+        'frame': encode_frame({
+            'type': 'notification',
+            'notification': notification_data
+        })
+    }
+
+
+def push_notifications(notifications):
     """
+    Counts saved notifications as unread and pushes each one to its
+    recipient's notification group from the worker's publisher loop.
+    """
+    count_unread(Counter((notification.recipient_id, notification.notification_type) for notification in notifications))
+
+    events = [
+        (f"user_{notification.recipient_id}_notifications", notification_event(notification_data(notification)))
+        for notification in notifications
+    ]
     try:
-        recipient = User.objects.get(id=recipient_id)
-        sender = User.objects.get(id=sender_id) if sender_id else None
+        publish_many(events)
+    except Exception as e:
+        # The rows exist, so recipients still see them in their list.
+        logger.error(f"Realtime push of {len(events)} notifications failed: {e}")
+
+
+def create_and_send_notification_batch(recipient_ids, sender, notification_type, message, related_object_id=None, related_object_type=None):
+    """
+    Creates the same notification for a batch of recipients with one bulk
+    INSERT and pushes every row to its recipient. The payload is rendered
+    once and only the recipient differs between rows.
+    Returns the number of notifications created.
+    """
+    template = Notification(
+        sender=sender,
+        notification_type=notification_type,
+        message=message,
+        related_object_id=related_object_id,
+        related_object_type=related_object_type
+    )
+    payload = build_notification_payload(template)
 
-        notification = Notification.objects.create(
-            recipient=recipient,
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            recipient_id=recipient_id,
             sender=sender,
             notification_type=notification_type,
             message=message,
             related_object_id=related_object_id,
-            related_object_type=related_object_type
+            related_object_type=related_object_type,
+            payload={**payload, 'recipient': recipient_id}
         )
+        for recipient_id in recipient_ids
+    ])
+    if not notifications:
+        return 0
 
-        serializer = NotificationSerializer(notification)
-        notification_data = serializer.data
+    push_notifications(notifications)
+    return len(notifications)
 
-        channel_layer = get_channel_layer()
-        group_name = f"user_{recipient.id}_notifications"
 
-        asyncio.run(
-            channel_layer.group_send(
-                group_name,
-                {
-                    'type': 'send_notification',
-                    'notification_data': notification_data
-                }
-            )
+@shared_task(bind=True) # `bind=True` allows the task to access itself for retries etc.
+def send_realtime_notification_task(self, recipient_id, sender_id, notification_type, message, related_object_id=None, related_object_type=None, skip_if_present=False):
+    """
+    Celery task to create a Notification in the DB and send it via WebSocket.
+    With `skip_if_present`, a ChatRoom notification is dropped when the
+    recipient currently has that room open.
+    """
+    if skip_if_present and related_object_type == 'ChatRoom' and is_in_room(recipient_id, related_object_id):
+        return
+
+    try:
+        create_and_send_notification(
+            recipient_id,
+            sender_id,
+            notification_type,
+            message,
+            related_object_id,
+            related_object_type
         )
         logger.info("Message send")
 
     except Exception as exc:
         logger.error("Some error happened")
         self.retry(exc=exc, countdown=60, max_retries=5)
+
+
+@shared_task(bind=True)
+def flush_message_notifications(self, recipient_id, sender_id, room_id, count=None):
+    """
+    Sends one `message_received` notification summarising every message
+    counted for (recipient, room) since the debounce window opened.
+    """
+    if count is None:
+        count = pop_pending_messages(recipient_id, room_id)
+    if not count or is_in_room(recipient_id, room_id):
+        return
+
+    sender_username = User.objects.filter(id=sender_id).values_list('username', flat=True).first()
+    if count == 1:
+        message = f"{sender_username} sent you a message."
+    else:
+        message = f"{count} new messages from {sender_username}."
+
+    try:
+        create_and_send_notification(
+            recipient_id,
+            sender_id,
+            'message_received',
+            message,
+            related_object_id=room_id,
+            related_object_type='ChatRoom'
+        )
+    except Exception as exc:
+        logger.error(f"Failed to send message notification to user {recipient_id}: {exc}")
+        # The counter is already cleared, so carry the count into the retry.
+        self.retry(
+            exc=exc,
+            countdown=60,
+            max_retries=5,
+            kwargs={'recipient_id': recipient_id, 'sender_id': sender_id, 'room_id': room_id, 'count': count}
+        )
+
+
+@shared_task(bind=True)
+def send_bulk_notification_task(self, recipient_ids, sender_id, notification_type, message, related_object_id=None, related_object_type=None):
+    """
+    Sends the same notification to many users, e.g. announcements or mass
+    cancellations, BULK_NOTIFICATION_BATCH_SIZE recipients at a time.
+    """
+    sender = User.objects.only('id', 'username').filter(id=sender_id).first() if sender_id else None
+    recipient_ids = list(
+        User.objects.filter(id__in=set(recipient_ids)).order_by('id').values_list('id', flat=True)
+    )
+
+    batch_size = settings.BULK_NOTIFICATION_BATCH_SIZE
+    created = 0
+    for start in range(0, len(recipient_ids), batch_size):
+        try:
+            created += create_and_send_notification_batch(
+                recipient_ids[start:start + batch_size],
+                sender,
+                notification_type,
+                message,
+                related_object_id,
+                related_object_type
+            )
+        except Exception as exc:
+            logger.error(f"Bulk {notification_type} notification failed after {created} recipients: {exc}")
+            # Earlier batches are already sent; retry only the rest.
+            self.retry(
+                exc=exc,
+                countdown=60,
+                max_retries=5,
+                kwargs={
+                    'recipient_ids': recipient_ids[start:],
+                    'sender_id': sender_id,
+                    'notification_type': notification_type,
+                    'message': message,
+                    'related_object_id': related_object_id,
+                    'related_object_type': related_object_type,
+                }
+            )
+
+    logger.info(f"Sent {created} {notification_type} notifications")
+
+
+@shared_task
+def relay_notification_outbox():
+    """
+    Delivers notifications recorded in the outbox. Scheduled every couple
+    of seconds by beat.
+    """
+    from .outbox import relay_outbox
+
+    relayed = relay_outbox(settings.NOTIFICATION_OUTBOX_BATCH_SIZE)
+    if relayed:
+        logger.info(f"Relayed {relayed} notifications from the outbox")
+    return relayed
+
+
+@shared_task
+def prune_old_notifications():
+    """
+    Deletes notifications past their retention period and reports how many
+    rows were reclaimed.
+    """
+    reclaimed = prune_notifications(
+        settings.NOTIFICATION_READ_RETENTION_DAYS,
+        settings.NOTIFICATION_UNREAD_RETENTION_DAYS,
+        settings.NOTIFICATION_PRUNE_BATCH_SIZE,
+    )
+    logger.info(f"Pruned {reclaimed['read']} read and {reclaimed['unread']} unread notifications")
+    return reclaimed
@@ -1,7 +1,12 @@
 from django.urls import path
 
-from .views import NotificationListView
+from .views import (NotificationDismissView, NotificationListView, NotificationMarkReadView,
+                    NotificationSummaryView, PresenceView)
 
 urlpatterns = [
     path("", NotificationListView.as_view(), name="notification"),    
+    path("summary/", NotificationSummaryView.as_view(), name="notification-summary"),
+    path("read/", NotificationMarkReadView.as_view(), name="notification-read"),
+    path("dismiss/", NotificationDismissView.as_view(), name="notification-dismiss"),
+    path("presence/", PresenceView.as_view(), name="presence"),
     ]
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db.models import Count
+
+from .models import Notification
+from .presence import is_in_room
+from .redis_utils import add_pending_message, cache_unread_notifications, get_cached_unread_notifications
+from .tasks import flush_message_notifications
+
+
+def notify_message_received(recipient_id, sender_id, room_id):
+    """
+    Debounces `message_received` notifications: the first message in a
+    window schedules one flush task, later messages in the same window only
+    bump a Redis counter, and the flush sends a single notification.
+    Nothing is queued while the recipient has the room open.
+    """
+    if is_in_room(recipient_id, room_id):
+        # The recipient is looking at the room and already got the message.
+        return
+
+    window = settings.MESSAGE_NOTIFICATION_DEBOUNCE_SECONDS
+    if add_pending_message(recipient_id, room_id, ttl=window * 4):
+        flush_message_notifications.apply_async(
+            kwargs={'recipient_id': recipient_id, 'sender_id': sender_id, 'room_id': room_id},
+            countdown=window,
+        )
+
+
+def refresh_unread_summary(user_id):
+    """
+    Recounts a user's unread notifications per type with one grouped query on
+    the (recipient, is_read, created_at) index and caches the result.
+    """
+    counts = dict.fromkeys((value for value, _ in Notification.NOTIFICATION_TYPES), 0)
+    counts.update(
+        Notification.objects
+        .filter(recipient_id=user_id, is_read=False)
+        .values_list('notification_type')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    cache_unread_notifications(user_id, counts)
+    return counts
+
+
+def get_unread_summary(user_id):
+    """
+    Returns {notification_type: unread_count} for every notification type,
+    from the Redis counter, or recounted on a miss.
+    """
+    counts = get_cached_unread_notifications(user_id)
+    if counts is None:
+        counts = refresh_unread_summary(user_id)
+    return counts
+
+
+def select_notifications(user_id, up_to_id=None, notification_type=None):
+    """
+    A user's notifications, narrowed to ids up to and including `up_to_id`
+    and/or to one type. Without either, every notification of the user.
+    """
+    notifications = Notification.objects.filter(recipient_id=user_id)
+    if up_to_id is not None:
+        notifications = notifications.filter(id__lte=up_to_id)
+    if notification_type is not None:
+        notifications = notifications.filter(notification_type=notification_type)
+    return notifications
+
+
+def mark_notifications_read(user_id, up_to_id=None, notification_type=None):
+    """
+    Marks the selected unread notifications as read with a single UPDATE and
+    resets the unread counters to what is still unread after it.
+    Returns (marked, unread counts by type).
+    """
+    marked = (
+        select_notifications(user_id, up_to_id, notification_type)
+        .filter(is_read=False)
+        .update(is_read=True)
+    )
+    return marked, refresh_unread_summary(user_id)
+
+
+def dismiss_notifications(user_id, up_to_id=None, notification_type=None):
+    """
+    Deletes the selected notifications, read or not, with a single DELETE
+    and resets the unread counters. Returns (dismissed, unread counts by type).
+    """
+    # Nothing references a notification, so Django issues one DELETE without
+    # loading the rows first.
+    dismissed, _ = select_notifications(user_id, up_to_id, notification_type).delete()
+    return dismissed, refresh_unread_summary(user_id)
@@ -1,17 +1,163 @@
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db.models import Q
 from django.shortcuts import render
-from rest_framework.generics import ListAPIView
+from rest_framework import status
+from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from auth.authentication import CookieJWTAuthentication
+from chat_app.models import ChatRoom
+from config.frames import encode_frame
 
 from .models import Notification
-from .serializers import NotificationSerializer
+from .pagination import NotificationCursorPagination
+from .presence import get_presence
+from .serializers import (NotificationSelectionSerializer, NotificationSerializer,
+                          notification_data)
+from .utils import dismiss_notifications, get_unread_summary, mark_notifications_read
 
 
 class NotificationListView(ListAPIView):
+    """
+    The user's notification feed, newest first and cursor-paginated.
+    `?unread=true` limits it to unread notifications.
+    """
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = NotificationSerializer
+    pagination_class = NotificationCursorPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user)
\ No newline at end of file
+        queryset = (
+            Notification.objects
+            .filter(recipient=self.request.user)
+            .only('id', 'recipient', 'is_read', 'created_at', 'payload')
+        )
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # Stored payloads are returned as they are; NotificationSerializer
+        # only runs for rows created before payloads were stored, which are
+        # loaded in full with one extra query.
+        page = self.paginate_queryset(self.get_queryset())
+        legacy = Notification.objects.select_related('sender').in_bulk(
+            [notification.id for notification in page if notification.payload is None]
+        )
+        return self.get_paginated_response([
+            notification_data(legacy.get(notification.id, notification)) for notification in page
+        ])
+
+
+class NotificationSummaryView(APIView):
+    """
+    Unread notification counts for the badge, in total and per type, read
+    from the Redis counter instead of counting rows.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        by_type = get_unread_summary(request.user.id)
+        return Response({
+            'unread_count': sum(by_type.values()),
+            'by_type': by_type,
+        }, status=status.HTTP_200_OK)
+
+
+class NotificationBulkUpdateView(GenericAPIView):
+    """
+    Applies `apply(user_id, up_to_id, notification_type)` to the selected
+    notifications and tells the user's connected sessions, so every open
+    tab updates its list and badge. Subclasses set `apply`, `event_type`
+    and the name of the count in the response.
+    """
+    serializer_class = NotificationSelectionSerializer
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    apply = None
+    event_type = None
+    count_field = None
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        up_to_id = serializer.validated_data.get('up_to_id')
+        notification_type = serializer.validated_data.get('notification_type')
+
+        changed, by_type = self.apply(request.user.id, up_to_id, notification_type)
+        payload = {
+            self.count_field: changed,
+            'unread_count': sum(by_type.values()),
+            'by_type': by_type,
+        }
+
+        if changed:
+            async_to_sync(get_channel_layer().group_send)(
+                f"user_{request.user.id}_notifications",
+                {
+                    'type': self.event_type,
+                    'frame': encode_frame({
+                        'type': self.event_type,
+                        'up_to_id': up_to_id,
+                        'notification_type': notification_type,
+                        **payload,
+                    }),
+                }
+            )
+
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class NotificationMarkReadView(NotificationBulkUpdateView):
+    """
+    Marks notifications read: all of them, those up to `up_to_id`, and/or
+    those of one `notification_type`.
+    """
+    apply = staticmethod(mark_notifications_read)
+    event_type = 'notifications_read'
+    count_field = 'marked'
+
+
+class NotificationDismissView(NotificationBulkUpdateView):
+    """
+    Deletes notifications, selected the same way as for marking them read.
+    """
+    apply = staticmethod(dismiss_notifications)
+    event_type = 'notifications_dismissed'
+    count_field = 'dismissed'
+
+
+class PresenceView(APIView):
+    """
+    Reports whether the given users (`?user_ids=1,2`) are online and which
+    shared chat rooms they currently have open. Only users the requester
+    shares a chat room with are reported.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            requested = {int(user_id) for user_id in request.query_params.get('user_ids', '').split(',') if user_id}
+        except ValueError:
+            return Response({'detail': 'user_ids must be a comma-separated list of ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        shared_rooms = {}
+        for room_id, student_id, mentor_id in ChatRoom.objects.filter(
+            Q(student=user) | Q(mentor=user)
+        ).values_list('id', 'student_id', 'mentor_id'):
+            counterpart_id = mentor_id if student_id == user.id else student_id
+            shared_rooms.setdefault(counterpart_id, set()).add(room_id)
+
+        visible = sorted(requested & shared_rooms.keys())
+        presence = get_presence(visible)
+        for user_id, state in presence.items():
+            state['rooms'] = [room_id for room_id in state['rooms'] if room_id in shared_rooms[user_id]]
+
+        return Response({'presence': presence}, status=status.HTTP_200_OK)